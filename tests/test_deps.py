@@ -6,28 +6,6 @@ from unittest import mock
 from yt_diarizer import deps
 
 
-class MacOsFfmpegDownloadTests(unittest.TestCase):
-    def _run_with_machine(self, machine: str):
-        with mock.patch("platform.machine", return_value=machine):
-            # Avoid real network calls to the GitHub API.
-            with mock.patch("urllib.request.urlopen", side_effect=Exception("no net")):
-                return deps._macos_ffmpeg_download()
-
-    def test_universal_candidates_included_for_arm(self) -> None:
-        urls, _ = self._run_with_machine("arm64")
-        self.assertTrue(
-            any("macos-universal" in url for url in urls),
-            "Universal macOS ffmpeg assets should be considered for ARM machines",
-        )
-
-    def test_universal_candidates_included_for_intel(self) -> None:
-        urls, _ = self._run_with_machine("x86_64")
-        self.assertTrue(
-            any("macos-universal" in url for url in urls),
-            "Universal macOS ffmpeg assets should be considered for Intel machines",
-        )
-
-
 class ManualFfmpegOverrideTests(unittest.TestCase):
     def test_directory_override_resolves_both_binaries(self) -> None:
         with tempfile.TemporaryDirectory() as tmpdir:
@@ -49,5 +27,42 @@ class ManualFfmpegOverrideTests(unittest.TestCase):
                 self.assertIn(tmpdir, os.environ["PATH"])
 
 
+class PathLookupTests(unittest.TestCase):
+    @unittest.skipIf(os.name == "nt", "POSIX executable bits required")
+    def test_which_many_scans_path_once_for_all_names(self) -> None:
+        with tempfile.TemporaryDirectory() as first, tempfile.TemporaryDirectory() as second:
+            ffmpeg_path = os.path.join(first, "ffmpeg")
+            ffprobe_path = os.path.join(second, "ffprobe")
+            for path in (ffmpeg_path, ffprobe_path):
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write("#!/bin/sh\n")
+                os.chmod(path, 0o755)
+
+            with mock.patch.dict(
+                os.environ, {"PATH": os.pathsep.join([first, second])}, clear=False
+            ):
+                resolved = deps.which_many(("ffmpeg", "ffprobe", "missing"))
+
+        self.assertEqual(
+            resolved,
+            {"ffmpeg": ffmpeg_path, "ffprobe": ffprobe_path, "missing": None},
+        )
+
+    def test_ensure_dependencies_resolves_all_tools_in_one_scan(self) -> None:
+        resolved = {
+            "ffmpeg": "/bin/ffmpeg",
+            "ffprobe": "/bin/ffprobe",
+            "whisperx": "/venv/bin/whisperx",
+            "yt-dlp": None,
+            "yt_dlp": "/venv/bin/yt_dlp",
+        }
+        with mock.patch("yt_diarizer.deps.which_many", return_value=resolved) as scan:
+            found = deps.ensure_dependencies()
+
+        scan.assert_called_once()
+        self.assertEqual(found["yt_downloader"], "/venv/bin/yt_dlp")
+        self.assertEqual(found["whisperx"], "/venv/bin/whisperx")
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,31 @@
+import yt_diarizer.json_utils as ju
+
+
+def test_round_trip_with_and_without_orjson(tmp_path, monkeypatch):
+    data = {"segments": [{"speaker": "АННА", "start": 1.5, "text": "Привет"}]}
+    for backend in (ju.orjson, None):
+        monkeypatch.setattr(ju, "orjson", backend)
+        path = tmp_path / f"out_{backend is None}.json"
+        ju.dump_json(data, str(path))
+        assert ju.load_json(str(path)) == data
+        assert "Привет" in path.read_text(encoding="utf-8")
+
+
+def test_load_json_accepts_non_finite_numbers(tmp_path):
+    path = tmp_path / "nan.json"
+    path.write_text('{"segments": [{"score": NaN}]}', encoding="utf-8")
+    loaded = ju.load_json(str(path))
+    assert loaded["segments"][0]["score"] != loaded["segments"][0]["score"]
+
+
+def test_dump_json_round_trips_non_finite_and_big_numbers(tmp_path):
+    path = tmp_path / "out.json"
+    data = {"segments": [{"score": float("nan"), "end": float("inf"), "id": 2**70}]}
+
+    ju.dump_json(data, str(path))
+    loaded = ju.load_json(str(path))
+
+    segment = loaded["segments"][0]
+    assert segment["score"] != segment["score"]
+    assert segment["end"] == float("inf")
+    assert segment["id"] == 2**70
@@ -1,6 +1,9 @@
+import errno
 import os
 import tempfile
 import unittest
+import zipfile
+from pathlib import Path
 from unittest import mock
 import sys
 
@@ -25,24 +28,61 @@ class InstallPythonDependenciesTests(unittest.TestCase):
         ):
             pipeline.install_python_dependencies("/venv/python")
 
-        self.assertEqual(len(calls), 4)
-        numpy_cmd, numpy_desc = calls[1]
-        self.assertIn("numpy==2.0.2", numpy_cmd)
-        self.assertIn("install numpy", numpy_desc)
-
-        torch_cmd, torch_desc = calls[2]
-        self.assertIn("install PyTorch wheels", torch_desc)
-        self.assertIn("torch==2.8.0", torch_cmd)
-        self.assertIn("torchaudio==2.8.0", torch_cmd)
-        self.assertIn("--index-url", torch_cmd)
-
-        whisper_cmd, whisper_desc = calls[3]
-        self.assertIn("install WhisperX", whisper_desc)
-        self.assertIn("whisperx==3.7.4", whisper_cmd)
-        self.assertIn("yt-dlp==2024.11.18", whisper_cmd)
+        self.assertEqual(len(calls), 2)
+        uv_cmd, uv_desc = calls[0]
+        self.assertIn("bootstrap uv", uv_desc)
+        self.assertEqual(uv_cmd[1:4], ["-m", "pip", "install"])
+
+        install_cmd, install_desc = calls[1]
+        self.assertIn("install WhisperX", install_desc)
+        self.assertEqual(install_cmd[1:5], ["-m", "uv", "pip", "install"])
+        self.assertIn("numpy==2.0.2", install_cmd)
+        self.assertIn("torch==2.8.0", install_cmd)
+        self.assertIn("torchaudio==2.8.0", install_cmd)
+        self.assertIn("whisperx==3.7.4", install_cmd)
+        self.assertIn("yt-dlp==2024.11.18", install_cmd)
+        # CPU torch wheels come from an extra index so WhisperX still resolves from PyPI.
+        self.assertIn("--extra-index-url", install_cmd)
+        self.assertNotIn("--index-url", install_cmd)
         # We no longer rely on an external constraints file for WhisperX.
-        self.assertNotIn("--constraint", whisper_cmd)
-        self.assertNotIn("pyannote.audio", " ".join(whisper_cmd))
+        self.assertNotIn("--constraint", install_cmd)
+        self.assertNotIn("pyannote.audio", " ".join(install_cmd))
+
+    def test_install_python_dependencies_mps_stack_skips_cpu_index(self) -> None:
+        calls = []
+
+        def _fake_run(cmd, description, env=None):
+            calls.append(cmd)
+            return 0, ["ok"]
+
+        with mock.patch("yt_diarizer.pipeline.run_logged_subprocess", side_effect=_fake_run), mock.patch(
+            "shutil.which", return_value="/usr/bin/pkg-config"
+        ):
+            pipeline.install_python_dependencies("/venv/python", mps_convert=True)
+
+        install_cmd = calls[-1]
+        self.assertIn("openai-whisper==20240930", install_cmd)
+        self.assertNotIn("--extra-index-url", install_cmd)
+
+    def test_cuda_driver_selects_matching_torch_index(self) -> None:
+        smi = mock.Mock(stdout="| NVIDIA-SMI 570.86  Driver Version: 570.86  CUDA Version: 12.8 |")
+        with mock.patch.dict(os.environ, {}, clear=False), mock.patch(
+            "shutil.which", return_value="/usr/bin/nvidia-smi"
+        ), mock.patch("subprocess.run", return_value=smi):
+            os.environ.pop("YT_DIARIZER_TORCH_INDEX", None)
+            index = pipeline._select_torch_index()
+
+        self.assertEqual(index, "https://download.pytorch.org/whl/cu128")
+        self.assertNotEqual(
+            pipeline._venv_fingerprint(False, index), pipeline._venv_fingerprint(False)
+        )
+
+    def test_torch_index_defaults_to_cpu_without_nvidia_driver(self) -> None:
+        with mock.patch.dict(os.environ, {}, clear=False), mock.patch(
+            "shutil.which", return_value=None
+        ):
+            os.environ.pop("YT_DIARIZER_TORCH_INDEX", None)
+            self.assertEqual(pipeline._select_torch_index(), pipeline.TORCH_CPU_INDEX)
 
     def test_install_python_dependencies_failure_reports_snippet(self) -> None:
         with mock.patch(
@@ -84,12 +124,152 @@ class InstallPythonDependenciesTests(unittest.TestCase):
             with mock.patch(
                 "yt_diarizer.pipeline.ensure_pkg_config_available",
                 side_effect=DependencyInstallationError("pkg-config not found"),
+            ), mock.patch(
+                "yt_diarizer.pipeline._has_required_modules", return_value=False
+            ), mock.patch(
+                "yt_diarizer.pipeline._venv_is_provisioned", return_value=False
             ), mock.patch("yt_diarizer.pipeline.run_logged_subprocess") as mocked_run:
                 with self.assertRaises(DependencyInstallationError):
                     pipeline.setup_and_run_in_venv(tmpdir, work_dir, entrypoint)
 
             mocked_run.assert_not_called()
 
+    def test_provisioned_venv_skips_pkg_config_preflight(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir, mock.patch(
+            "yt_diarizer.pipeline._has_required_modules", return_value=False
+        ), mock.patch(
+            "yt_diarizer.pipeline._venv_is_provisioned", return_value=True
+        ), mock.patch(
+            "yt_diarizer.pipeline.ensure_pkg_config_available"
+        ) as preflight, mock.patch(
+            "yt_diarizer.pipeline._provision_venv", return_value=("/venv/bin", "/venv/bin/python")
+        ), mock.patch(
+            "yt_diarizer.pipeline.ensure_ffmpeg", return_value={"location_dir": None}
+        ), mock.patch(
+            "yt_diarizer.pipeline._start_import_prewarm", return_value=None
+        ), mock.patch(
+            "subprocess.run", return_value=mock.Mock(returncode=0)
+        ):
+            exit_code = pipeline.setup_and_run_in_venv(tmpdir, tmpdir, "entry.py", mps_convert=True)
+
+        self.assertEqual(exit_code, 0)
+        preflight.assert_not_called()
+
+    def test_prebuilt_environment_runs_pipeline_without_venv(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir, mock.patch.dict(
+            os.environ, {}, clear=False
+        ), mock.patch(
+            "yt_diarizer.pipeline._has_required_modules", return_value=True
+        ), mock.patch(
+            "yt_diarizer.pipeline._provision_venv"
+        ) as provision, mock.patch(
+            "yt_diarizer.pipeline.run_pipeline_inside_venv"
+        ) as run_inner:
+            exit_code = pipeline.setup_and_run_in_venv(tmpdir, tmpdir, "entry.py")
+            stage = os.environ.get(pipeline.ENV_STAGE_VAR)
+
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(stage, "inner")
+        run_inner.assert_called_once_with(tmpdir, tmpdir)
+        provision.assert_not_called()
+
+    def test_in_process_run_uses_cuda_when_torch_sees_a_gpu(self) -> None:
+        devices = []
+
+        def _fake_whisperx(
+            whisperx_bin, audio_path, hf_token, work_dir, cache_dir=None, before_run=None
+        ):
+            devices.append(os.environ.get("YT_DIARIZER_DEVICE"))
+            return os.path.join(work_dir, "audio.json")
+
+        fake_torch = mock.Mock()
+        fake_torch.cuda.is_available.return_value = True
+        with tempfile.TemporaryDirectory() as tmpdir, mock.patch.dict(
+            os.environ,
+            {
+                "YT_DIARIZER_SKIP_VENV": "1",
+                "YT_DIARIZER_NO_PREFETCH": "1",
+                "YT_DIARIZER_SKIP_HF_PROBE": "1",
+                "HF_TOKEN": "token",
+            },
+        ), mock.patch.dict(sys.modules, {"torch": fake_torch}), mock.patch(
+            "shutil.which", return_value="/usr/bin/nvidia-smi"
+        ), mock.patch(
+            "yt_diarizer.pipeline.ensure_ffmpeg", return_value={"location_dir": tmpdir}
+        ), mock.patch(
+            "yt_diarizer.pipeline._resolve_youtube_url", return_value="https://youtu.be/abc"
+        ), mock.patch(
+            "yt_diarizer.pipeline.ensure_dependencies",
+            return_value={"yt_downloader": "yt-dlp", "whisperx": "whisperx"},
+        ), mock.patch(
+            "yt_diarizer.pipeline.download_best_audio",
+            return_value=os.path.join(tmpdir, "audio.wav"),
+        ), mock.patch(
+            "yt_diarizer.pipeline.run_whisperx_cli", side_effect=_fake_whisperx
+        ), mock.patch(
+            "yt_diarizer.pipeline.build_diarized_transcript_from_json", return_value=[]
+        ), mock.patch(
+            "yt_diarizer.pipeline.save_final_outputs",
+            return_value={"txt": "out.txt", "json": "out.json"},
+        ):
+            for name in ("YT_DIARIZER_DEVICE", pipeline.ENV_MPS_CONVERT_VAR):
+                os.environ.pop(name, None)
+            exit_code = pipeline.setup_and_run_in_venv(tmpdir, tmpdir, "entry.py")
+
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(devices, ["cuda"])
+
+    def test_provisioned_venv_is_reused(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fingerprint = pipeline._venv_fingerprint(False)
+            venv_dir = os.path.join(tmpdir, "venvs", fingerprint)
+            bin_name = "Scripts" if os.name == "nt" else "bin"
+            python_name = "python.exe" if os.name == "nt" else "python"
+            os.makedirs(os.path.join(venv_dir, bin_name))
+            for path in (
+                os.path.join(venv_dir, bin_name, python_name),
+                os.path.join(venv_dir, f".provisioned-{fingerprint}"),
+            ):
+                with open(path, "w", encoding="utf-8"):
+                    pass
+
+            with mock.patch(
+                "yt_diarizer.pipeline._user_cache_dir", return_value=tmpdir
+            ), mock.patch("yt_diarizer.pipeline.run_logged_subprocess") as mocked_run:
+                venv_bin, venv_python = pipeline._provision_venv(tmpdir, False)
+
+            mocked_run.assert_not_called()
+            self.assertEqual(venv_python, os.path.join(venv_dir, bin_name, python_name))
+            self.assertEqual(venv_bin, os.path.join(venv_dir, bin_name))
+
+
+class CacheDirTests(unittest.TestCase):
+    def test_ephemeral_cache_redirects_unset_cache_vars_only(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir, mock.patch.dict(
+            os.environ,
+            {
+                "YT_DIARIZER_EPHEMERAL_CACHE": "1",
+                "HF_HOME": "/custom/hf",
+                "TORCH_HOME": "",
+                "XDG_CACHE_HOME": "/xdg/cache",
+            },
+        ):
+            pipeline._configure_cache_dirs(tmpdir)
+            cache_root = os.path.join(tmpdir, "cache")
+            self.assertEqual(os.environ["HF_HOME"], "/custom/hf")
+            self.assertEqual(os.environ["TORCH_HOME"], os.path.join(cache_root, "torch"))
+            # The ffmpeg manifest and venvs must outlive the workspace.
+            self.assertEqual(os.environ["XDG_CACHE_HOME"], "/xdg/cache")
+            self.assertEqual(
+                pipeline._user_cache_dir(), os.path.join("/xdg/cache", "yt_diarizer")
+            )
+
+    def test_user_cache_dir_follows_xdg_cache_home(self) -> None:
+        with mock.patch.dict(os.environ, {"XDG_CACHE_HOME": "/xdg/cache"}):
+            self.assertEqual(
+                pipeline._user_cache_dir(), os.path.join("/xdg/cache", "yt_diarizer")
+            )
+
 
 class WorkspaceCleanupTests(unittest.TestCase):
     def test_workspace_removed_after_failure(self) -> None:
@@ -120,9 +300,429 @@ class TokenResolutionTests(unittest.TestCase):
             with open(token_path, "w", encoding="utf-8") as f:
                 f.write("secret-token")
 
-            token = pipeline.load_hf_token(pkg_dir)
+            with mock.patch.dict(os.environ, {}, clear=False):
+                os.environ.pop("HF_TOKEN", None)
+                token = pipeline.load_hf_token(pkg_dir)
             self.assertEqual(token, "secret-token")
 
+    def test_hf_token_env_var_skips_token_file_lookup(self) -> None:
+        with mock.patch.dict(os.environ, {"HF_TOKEN": " env-token "}):
+            with mock.patch("builtins.open") as mocked_open:
+                token = pipeline.load_hf_token("/nonexistent")
+
+        self.assertEqual(token, "env-token")
+        mocked_open.assert_not_called()
+
+    def test_token_lookup_skips_directories_named_like_the_token(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            pkg_dir = os.path.join(tmpdir, "yt_diarizer")
+            os.makedirs(os.path.join(tmpdir, "token.txt"))
+            os.makedirs(pkg_dir)
+            with open(os.path.join(pkg_dir, "token.txt"), "w", encoding="utf-8") as f:
+                f.write("pkg-token\n")
+
+            with mock.patch.dict(os.environ, {}, clear=False):
+                os.environ.pop("HF_TOKEN", None)
+                token = pipeline.load_hf_token(pkg_dir)
+
+        self.assertEqual(token, "pkg-token")
+
+    def test_hf_probe_rejects_unauthorized_token(self) -> None:
+        from urllib.error import HTTPError
+
+        error = HTTPError("https://huggingface.co", 403, "Forbidden", {}, None)
+        with mock.patch("urllib.request.urlopen", side_effect=error):
+            with self.assertRaises(DependencyError) as ctx:
+                pipeline._probe_hf_model("bad-token")
+
+        self.assertIn("accept the model license", str(ctx.exception))
+
+    def test_hf_probe_failure_stops_pipeline_before_download(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir, mock.patch.dict(
+            os.environ, {"HF_TOKEN": "token"}
+        ), mock.patch(
+            "yt_diarizer.pipeline.ensure_ffmpeg",
+            return_value={"location_dir": tmpdir},
+        ), mock.patch(
+            "yt_diarizer.pipeline._resolve_youtube_url",
+            return_value="https://youtu.be/abc",
+        ) as resolve_url, mock.patch(
+            "yt_diarizer.pipeline._probe_hf_model",
+            side_effect=DependencyError("accept the model license"),
+        ), mock.patch(
+            "yt_diarizer.pipeline.download_best_audio"
+        ) as download:
+            os.environ.pop(pipeline.ENV_MPS_CONVERT_VAR, None)
+            os.environ.pop("YT_DIARIZER_SKIP_HF_PROBE", None)
+            with self.assertRaises(DependencyError):
+                pipeline.run_pipeline_inside_venv(tmpdir, tmpdir)
+
+        resolve_url.assert_called_once()
+        download.assert_not_called()
+
+    def test_hf_probe_ignores_network_errors(self) -> None:
+        from urllib.error import URLError
+
+        with mock.patch("urllib.request.urlopen", side_effect=URLError("offline")):
+            pipeline._probe_hf_model("token")
+
+
+class ModelPrefetchTests(unittest.TestCase):
+    def test_model_prefetch_failures_are_ignored(self) -> None:
+        fetched = []
+
+        def _snapshot_download(repo_id, token=None, allow_patterns=None):
+            fetched.append(repo_id)
+            if repo_id.startswith("pyannote/"):
+                raise RuntimeError("gated")
+
+        fake_hub = mock.Mock(snapshot_download=_snapshot_download)
+        with mock.patch.dict(sys.modules, {"huggingface_hub": fake_hub}):
+            pipeline._prefetch_whisperx_models("token")
+
+        self.assertEqual(fetched, [repo for repo, _ in pipeline._PREFETCH_MODELS])
+
+    def test_stalled_prefetch_does_not_block_transcription(self) -> None:
+        import threading
+
+        release = threading.Event()
+        waited = []
+
+        def _fake_whisperx(
+            whisperx_bin, audio_path, hf_token, work_dir, cache_dir=None, before_run=None
+        ):
+            before_run()
+            waited.append(True)
+            return os.path.join(work_dir, "audio.json")
+
+        try:
+            with tempfile.TemporaryDirectory() as tmpdir, mock.patch.dict(
+                os.environ,
+                {"YT_DIARIZER_SKIP_HF_PROBE": "1", "YT_DIARIZER_DEVICE": "cpu", "HF_TOKEN": "token"},
+            ), mock.patch.object(pipeline, "_PREFETCH_WAIT_SECONDS", 0.05), mock.patch(
+                "yt_diarizer.pipeline._prefetch_whisperx_models",
+                side_effect=lambda token: release.wait(5),
+            ), mock.patch(
+                "yt_diarizer.pipeline.ensure_ffmpeg", return_value={"location_dir": tmpdir}
+            ), mock.patch(
+                "yt_diarizer.pipeline._resolve_youtube_url", return_value="https://youtu.be/abc"
+            ), mock.patch(
+                "yt_diarizer.pipeline.ensure_dependencies",
+                return_value={"yt_downloader": "yt-dlp", "whisperx": "whisperx"},
+            ), mock.patch(
+                "yt_diarizer.pipeline.download_best_audio",
+                return_value=os.path.join(tmpdir, "audio.wav"),
+            ), mock.patch(
+                "yt_diarizer.pipeline.run_whisperx_cli", side_effect=_fake_whisperx
+            ), mock.patch(
+                "yt_diarizer.pipeline.build_diarized_transcript_from_json", return_value=[]
+            ), mock.patch(
+                "yt_diarizer.pipeline.save_final_outputs",
+                return_value={"txt": "out.txt", "json": "out.json"},
+            ):
+                for name in ("YT_DIARIZER_NO_PREFETCH", pipeline.ENV_MPS_CONVERT_VAR):
+                    os.environ.pop(name, None)
+                pipeline.run_pipeline_inside_venv(tmpdir, tmpdir)
+        finally:
+            release.set()
+
+        self.assertEqual(waited, [True])
+
+
+class OutputNameTests(unittest.TestCase):
+    def test_unsafe_characters_and_underscores_collapse_to_one(self) -> None:
+        self.assertEqual(
+            pipeline._build_output_base_name_from_url(
+                "https://www.youtube.com/watch?v=ab__c&t=1#t=1m 2s"
+            ),
+            "diarized_transcript_www.youtube.com_ab_c_t_1m_2s",
+        )
+        self.assertEqual(
+            pipeline._build_output_base_name_from_url("youtu.be/dQw4w9WgXcQ"),
+            "diarized_transcript_youtu.be_dQw4w9WgXcQ",
+        )
+
+    def test_first_non_empty_v_parameter_is_used(self) -> None:
+        self.assertEqual(
+            pipeline._build_output_base_name_from_url(
+                "www.youtube.com/watch?feature=share&v=&v=abc%2Dd&list=x"
+            ),
+            "diarized_transcript_www.youtube.com_abc-d",
+        )
+
+
+class SaveFinalOutputsTests(unittest.TestCase):
+    def test_writes_lines_and_moves_json(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            json_path = os.path.join(tmpdir, "audio.json")
+            with open(json_path, "w", encoding="utf-8") as f:
+                f.write("{}")
+
+            outputs = pipeline.save_final_outputs(
+                ["line one", "line two"],
+                json_path,
+                tmpdir,
+                "https://www.youtube.com/watch?v=abc123",
+            )
+
+            with open(outputs["txt"], "r", encoding="utf-8") as f:
+                self.assertEqual(f.read(), "line one\nline two\n")
+            self.assertTrue(os.path.isfile(outputs["json"]))
+            self.assertFalse(os.path.exists(json_path))
+
+    def test_chunked_txt_write_matches_single_join(self) -> None:
+        lines = [f"line {i}" for i in range(5)]
+        with tempfile.TemporaryDirectory() as tmpdir, mock.patch.object(
+            pipeline, "_TXT_WRITE_CHUNK_LINES", 2
+        ):
+            json_path = os.path.join(tmpdir, "audio.json")
+            with open(json_path, "w", encoding="utf-8") as f:
+                f.write("{}")
+
+            outputs = pipeline.save_final_outputs(lines, json_path, tmpdir, "abc")
+
+            with open(outputs["txt"], "rb") as f:
+                self.assertEqual(f.read(), ("\n".join(lines) + "\n").encode("utf-8"))
+
+    def test_json_copied_when_rename_crosses_devices(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            json_path = os.path.join(tmpdir, "audio.json")
+            with open(json_path, "w", encoding="utf-8") as f:
+                f.write('{"segments": []}')
+
+            with mock.patch(
+                "yt_diarizer.pipeline.os.replace",
+                side_effect=OSError(errno.EXDEV, "Invalid cross-device link"),
+            ):
+                outputs = pipeline.save_final_outputs([], json_path, tmpdir, "abc")
+
+            with open(outputs["json"], "r", encoding="utf-8") as f:
+                self.assertEqual(f.read(), '{"segments": []}')
+            self.assertFalse(os.path.exists(json_path))
+
+
+class ArchiveExtractionTests(unittest.TestCase):
+    def test_parallel_zip_extraction_matches_archive_layout(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            archive_path = os.path.join(tmpdir, "ffmpeg.zip")
+            with zipfile.ZipFile(archive_path, "w", zipfile.ZIP_DEFLATED) as zf:
+                zf.writestr("ffmpeg-build/bin/ffmpeg", "ffmpeg" * 1000)
+                zf.writestr("ffmpeg-build/bin/ffprobe", "ffprobe")
+                zf.writestr("ffmpeg-build/doc/", "")
+                zf.writestr("../outside.txt", "escaped")
+
+            unpack_dir = os.path.join(tmpdir, "unpacked")
+            pipeline._extract_zip_parallel(archive_path, unpack_dir)
+
+            with open(
+                os.path.join(unpack_dir, "ffmpeg-build", "bin", "ffmpeg"), encoding="utf-8"
+            ) as f:
+                self.assertEqual(f.read(), "ffmpeg" * 1000)
+            self.assertTrue(os.path.isdir(os.path.join(unpack_dir, "ffmpeg-build", "doc")))
+            self.assertFalse(os.path.exists(os.path.join(tmpdir, "outside.txt")))
+
+    def test_tar_archive_is_extracted_while_streaming(self) -> None:
+        import io
+        import tarfile
+
+        payload = io.BytesIO()
+        with tarfile.open(fileobj=payload, mode="w:xz") as tf:
+            data = b"#!/bin/sh\n"
+            info = tarfile.TarInfo("ffmpeg-build/bin/ffmpeg")
+            info.size = len(data)
+            tf.addfile(info, io.BytesIO(data))
+        payload.seek(0)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            archive_path = os.path.join(tmpdir, "ffmpeg.tar.xz")
+            unpack_dir = os.path.join(tmpdir, "unpacked")
+            with mock.patch("urllib.request.urlopen", return_value=payload):
+                pipeline._download_and_extract_archive(
+                    ["https://example.invalid/ffmpeg.tar.xz"], archive_path, unpack_dir
+                )
+
+            self.assertTrue(
+                os.path.isfile(os.path.join(unpack_dir, "ffmpeg-build", "bin", "ffmpeg"))
+            )
+            self.assertFalse(os.path.exists(archive_path))
+
+    def test_truncated_download_falls_through_to_runtime_error(self) -> None:
+        import http.client
+
+        response = mock.MagicMock()
+        response.__enter__.return_value = response
+        response.read.side_effect = http.client.IncompleteRead(b"partial", 100)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with mock.patch("urllib.request.urlopen", return_value=response):
+                with self.assertRaises(RuntimeError):
+                    pipeline._download_and_extract_archive(
+                        ["https://example.invalid/ffmpeg.zip"],
+                        os.path.join(tmpdir, "ffmpeg.zip"),
+                        os.path.join(tmpdir, "unpacked"),
+                    )
+
+    def test_corrupt_tar_stream_tries_next_mirror(self) -> None:
+        import io
+        import lzma
+        import tarfile
+
+        good = io.BytesIO()
+        with tarfile.open(fileobj=good, mode="w:xz") as tf:
+            data = b"#!/bin/sh\n"
+            info = tarfile.TarInfo("ffmpeg-build/bin/ffmpeg")
+            info.size = len(data)
+            tf.addfile(info, io.BytesIO(data))
+        good.seek(0)
+
+        def _failing(exc: Exception) -> mock.MagicMock:
+            response = mock.MagicMock()
+            response.__enter__.return_value = response
+            response.read.side_effect = exc
+            return response
+
+        responses = {
+            "https://example.invalid/cut.tar.xz": _failing(EOFError("cut off")),
+            "https://example.invalid/bad.tar.xz": _failing(lzma.LZMAError("corrupt")),
+            "https://example.invalid/ok.tar.xz": good,
+        }
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            unpack_dir = os.path.join(tmpdir, "unpacked")
+            with mock.patch.object(
+                pipeline, "_rank_download_urls", side_effect=lambda urls: list(urls)
+            ), mock.patch(
+                "urllib.request.urlopen",
+                side_effect=lambda request, timeout=None: responses[request.full_url],
+            ):
+                pipeline._download_and_extract_archive(
+                    list(responses), os.path.join(tmpdir, "ffmpeg.tar.xz"), unpack_dir
+                )
+
+            self.assertTrue(
+                os.path.isfile(os.path.join(unpack_dir, "ffmpeg-build", "bin", "ffmpeg"))
+            )
+
+    def test_download_urls_ranked_by_head_probe(self) -> None:
+        from urllib.error import HTTPError
+
+        def _fake_urlopen(request, timeout=None):
+            if request.full_url.endswith("dead.zip"):
+                raise HTTPError(request.full_url, 404, "Not Found", {}, None)
+            response = mock.MagicMock()
+            response.__enter__.return_value = response
+            response.status = 200
+            response.headers = {"Content-Length": str(50 * 1024 * 1024)}
+            return response
+
+        urls = ["https://example.invalid/dead.zip", "https://example.invalid/live.zip"]
+        with mock.patch("urllib.request.urlopen", side_effect=_fake_urlopen):
+            ranked = pipeline._rank_download_urls(urls)
+
+        self.assertEqual(ranked, list(reversed(urls)))
+
+    def test_stalled_head_probe_does_not_delay_ranking(self) -> None:
+        import threading
+        import time
+
+        release = threading.Event()
+
+        def _fake_urlopen(request, timeout=None):
+            if request.full_url.endswith("stalled.zip"):
+                release.wait(5)
+                raise OSError("timed out")
+            response = mock.MagicMock()
+            response.__enter__.return_value = response
+            response.status = 200
+            response.headers = {"Content-Length": str(50 * 1024 * 1024)}
+            return response
+
+        urls = [
+            "https://example.invalid/stalled.zip",
+            "https://example.invalid/live.zip",
+            "https://example.invalid/other.zip",
+        ]
+        try:
+            with mock.patch("urllib.request.urlopen", side_effect=_fake_urlopen):
+                started = time.monotonic()
+                ranked = pipeline._rank_download_urls(urls, overall_timeout=0.2)
+                elapsed = time.monotonic() - started
+        finally:
+            release.set()
+
+        self.assertLess(elapsed, 2)
+        self.assertEqual(ranked, [urls[1], urls[2], urls[0]])
+
+    def test_binary_search_prefers_shallow_matches_and_skips_docs(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            layout = [
+                os.path.join("build", "share", "ffmpeg"),
+                os.path.join("build", "bin", "ffmpeg"),
+                os.path.join("build", "bin", "ffprobe"),
+                os.path.join("build", "bin", "nested", "ffprobe"),
+            ]
+            for rel in layout:
+                path = os.path.join(tmpdir, rel)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "w", encoding="utf-8"):
+                    pass
+
+            found = pipeline._find_binaries(tmpdir, ("ffmpeg", "ffprobe", "missing"))
+
+        self.assertEqual(found["ffmpeg"].parent.name, "bin")
+        self.assertEqual(found["ffprobe"].parent.name, "bin")
+        self.assertIsNone(found["missing"])
+
+
+class MacOsInstallNameTests(unittest.TestCase):
+    def test_install_name_changes_are_batched_per_binary(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            (root / "bin").mkdir()
+            (root / "lib").mkdir()
+            for rel in ("bin/ffmpeg", "bin/ffprobe", "lib/libavutil.57.dylib", "lib/libavcodec.59.dylib"):
+                (root / rel).write_text("")
+
+            otool_output = (
+                "binary:\n"
+                "\t/Users/runner/work/lib/libavutil.57.dylib (compatibility version 57.0.0)\n"
+                "\t/Users/runner/work/lib/libavcodec.59.dylib (compatibility version 59.0.0)\n"
+                "\t/usr/lib/libSystem.B.dylib (compatibility version 1.0.0)\n"
+            )
+            with mock.patch("subprocess.check_output", return_value=otool_output), mock.patch(
+                "subprocess.run"
+            ) as run:
+                pipeline._fix_macos_ffmpeg_install_names(root)
+
+        cmds = [call.args[0] for call in run.call_args_list]
+        self.assertEqual(len(cmds), 4)
+        for cmd in cmds:
+            self.assertEqual(cmd[0], "install_name_tool")
+            self.assertEqual(cmd.count("-change"), 2)
+        ffmpeg_cmd = next(cmd for cmd in cmds if cmd[-1].endswith("ffmpeg"))
+        self.assertIn("@executable_path/../lib/libavutil.57.dylib", ffmpeg_cmd)
+
+    def test_prepare_copies_dylibs_but_skips_pruned_directories(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            unpack = Path(tmpdir) / "unpack"
+            for rel in (
+                "build/bin/ffmpeg",
+                "build/bin/ffprobe",
+                "build/lib/libavutil.57.dylib",
+                "build/include/libfake.dylib",
+                "__MACOSX/build/lib/._libavutil.57.dylib",
+            ):
+                (unpack / rel).parent.mkdir(parents=True, exist_ok=True)
+                (unpack / rel).write_text("")
+
+            work = Path(tmpdir) / "work"
+            with mock.patch("yt_diarizer.pipeline._fix_macos_ffmpeg_install_names"):
+                pipeline._prepare_macos_ffmpeg(unpack, work)
+
+            copied = sorted(os.listdir(work / "ffmpeg_macos" / "lib"))
+
+        self.assertEqual(copied, ["libavutil.57.dylib"])
+
 
 class FfmpegChecksTests(unittest.TestCase):
     def test_env_override_used_when_present(self) -> None:
@@ -147,17 +747,96 @@ class FfmpegChecksTests(unittest.TestCase):
             self.assertEqual(paths["ffprobe"], ffprobe_path)
 
     def test_path_detection_short_circuits_download(self) -> None:
-        with mock.patch("shutil.which", side_effect=["/usr/bin/ffmpeg", "/usr/bin/ffprobe"]):
+        with mock.patch(
+            "yt_diarizer.pipeline.which_many",
+            return_value={"ffmpeg": "/usr/bin/ffmpeg", "ffprobe": "/usr/bin/ffprobe"},
+        ):
             paths = pipeline.ensure_ffmpeg("/tmp/work")
 
         self.assertEqual(paths["ffmpeg"], "/usr/bin/ffmpeg")
         self.assertEqual(paths["ffprobe"], "/usr/bin/ffprobe")
 
+    @unittest.skipIf(os.name == "nt", "POSIX executable bits required")
+    def test_workspace_prepared_ffmpeg_skips_download(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            bin_dir = os.path.join(tmpdir, "ffmpeg_other", "bin")
+            os.makedirs(bin_dir)
+            paths = {}
+            for name in ("ffmpeg", "ffprobe"):
+                paths[name] = os.path.join(bin_dir, name)
+                with open(paths[name], "w", encoding="utf-8") as f:
+                    f.write("#!/bin/sh\n")
+                os.chmod(paths[name], 0o755)
+            pipeline._mark_workspace_ffmpeg(tmpdir, paths)
+
+            with mock.patch.dict(os.environ, {}, clear=False), mock.patch(
+                "yt_diarizer.pipeline._ffmpeg_from_env", return_value=None
+            ), mock.patch(
+                "yt_diarizer.pipeline._ffmpeg_from_path", return_value=None
+            ), mock.patch(
+                "yt_diarizer.pipeline._load_ffmpeg_manifest", return_value=None
+            ), mock.patch(
+                "yt_diarizer.pipeline.download_ffmpeg_for_other_platforms"
+            ) as download, mock.patch(
+                "yt_diarizer.pipeline.download_ffmpeg_for_macos"
+            ) as download_macos:
+                resolved = pipeline.ensure_ffmpeg(tmpdir)
+
+        self.assertEqual(resolved["ffmpeg"], paths["ffmpeg"])
+        self.assertEqual(resolved["location_dir"], bin_dir)
+        download.assert_not_called()
+        download_macos.assert_not_called()
+
+    def test_outer_stage_ffmpeg_dir_skips_resolution(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for name in ("ffmpeg", "ffprobe"):
+                with open(os.path.join(tmpdir, name), "w", encoding="utf-8") as f:
+                    f.write("#!/bin/sh\n")
+
+            with mock.patch.dict(
+                os.environ, {"YT_DIARIZER_FFMPEG_DIR": tmpdir}, clear=False
+            ), mock.patch("yt_diarizer.pipeline._ffmpeg_from_path") as from_path:
+                paths = pipeline.ensure_ffmpeg(tmpdir)
+
+            from_path.assert_not_called()
+            self.assertEqual(paths["ffmpeg"], os.path.join(tmpdir, "ffmpeg"))
+            self.assertEqual(paths["location_dir"], tmpdir)
+
+    def test_downloaded_ffmpeg_reused_from_manifest(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            download_dir = os.path.join(tmpdir, "work", "ffmpeg_other", "bin")
+            os.makedirs(download_dir)
+            for name in ("ffmpeg", "ffprobe"):
+                with open(os.path.join(download_dir, name), "w", encoding="utf-8") as f:
+                    f.write("#!/bin/sh\n")
+            downloaded = {
+                "ffmpeg": os.path.join(download_dir, "ffmpeg"),
+                "ffprobe": os.path.join(download_dir, "ffprobe"),
+            }
+            cache_dir = os.path.join(tmpdir, "cache")
+
+            with mock.patch("sys.platform", "linux"), mock.patch(
+                "yt_diarizer.pipeline._user_cache_dir", return_value=cache_dir
+            ), mock.patch(
+                "yt_diarizer.pipeline._ffmpeg_from_path", return_value=None
+            ), mock.patch(
+                "yt_diarizer.pipeline.download_ffmpeg_for_other_platforms",
+                return_value=downloaded,
+            ) as mocked_download:
+                first = pipeline.ensure_ffmpeg(os.path.join(tmpdir, "work"))
+                second = pipeline.ensure_ffmpeg(os.path.join(tmpdir, "work"))
+
+            self.assertEqual(mocked_download.call_count, 1)
+            self.assertTrue(first["ffmpeg"].startswith(cache_dir))
+            self.assertEqual(first, second)
+
     def test_download_failure_on_non_macos_reports_runtime_error(self) -> None:
         with mock.patch("sys.platform", "linux"), mock.patch(
             "yt_diarizer.pipeline.download_ffmpeg_for_other_platforms",
             side_effect=RuntimeError("network error"),
-        ), mock.patch("yt_diarizer.pipeline._ffmpeg_from_path", return_value=None):
+        ), mock.patch("yt_diarizer.pipeline._ffmpeg_from_path", return_value=None), mock.patch(
+            "yt_diarizer.pipeline._load_ffmpeg_manifest", return_value=None
+        ):
             with self.assertRaises(RuntimeError) as ctx:
                 pipeline.ensure_ffmpeg("/tmp/work")
 
@@ -0,0 +1,75 @@
+import io
+import os
+import sys
+import unittest
+from unittest import mock
+
+from yt_diarizer import process
+
+
+class RunLoggedSubprocessTests(unittest.TestCase):
+    def _run(self, script: str, debug_mock=None, tail=None):
+        console = io.TextIOWrapper(io.BytesIO())
+        with mock.patch.object(process.sys, "stdout", console), mock.patch.object(
+            process, "log_line"
+        ), mock.patch.object(process, "debug", debug_mock or mock.Mock()):
+            returncode, lines = process.run_logged_subprocess(
+                [sys.executable, "-c", script], "test", tail=tail
+            )
+        return returncode, lines, console.buffer.getvalue()
+
+    def test_collects_lines_and_mirrors_raw_output(self) -> None:
+        returncode, lines, raw = self._run(
+            "import sys; sys.stdout.write('first\\nsecond\\r\\nlast'); sys.exit(3)"
+        )
+
+        self.assertEqual(returncode, 3)
+        self.assertEqual(lines, ["first", "second", "last"])
+        self.assertEqual(raw, b"first\nsecond\r\nlast")
+
+    def test_decodes_utf8_split_across_reads(self) -> None:
+        returncode, lines, _ = self._run(
+            "import sys, time\n"
+            "data = 'Привет\\n'.encode('utf-8')\n"
+            "sys.stdout.buffer.write(data[:3]); sys.stdout.flush(); time.sleep(0.2)\n"
+            "sys.stdout.buffer.write(data[3:]); sys.stdout.flush()"
+        )
+
+        self.assertEqual(returncode, 0)
+        self.assertEqual(lines, ["Привет"])
+
+    def test_keeps_only_final_progress_frame(self) -> None:
+        returncode, lines, raw = self._run(
+            "import sys\n"
+            "sys.stdout.write('[download]  1%\\r[download] 50%\\r[download] 100%\\r\\n')\n"
+            "sys.stdout.write('Done\\n')"
+        )
+
+        self.assertEqual(returncode, 0)
+        self.assertEqual(lines, ["[download] 100%", "Done"])
+        self.assertIn(b"[download]  1%\r", raw)
+
+    @unittest.skipIf(os.name == "nt", "keepalive relies on selectors over pipes")
+    def test_logs_keepalive_while_child_is_silent(self) -> None:
+        debug_mock = mock.Mock()
+        with mock.patch.object(process, "_KEEPALIVE_SECONDS", 0.05):
+            returncode, lines, _ = self._run(
+                "import time; time.sleep(0.3); print('done')", debug_mock
+            )
+
+        self.assertEqual(returncode, 0)
+        self.assertEqual(lines, ["done"])
+        messages = [call.args[0] for call in debug_mock.call_args_list]
+        self.assertTrue(any("Still running (test)" in msg for msg in messages))
+
+    def test_tail_keeps_last_non_empty_lines(self) -> None:
+        returncode, lines, _ = self._run(
+            "for i in range(10): print(i); print()", tail=3
+        )
+
+        self.assertEqual(returncode, 0)
+        self.assertEqual(lines, ["7", "8", "9"])
+
+
+if __name__ == "__main__":
+    unittest.main()
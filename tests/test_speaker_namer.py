@@ -1,5 +1,7 @@
 import json
 
+import pytest
+
 import yt_diarizer.speaker_namer as sn
 
 
@@ -130,3 +132,113 @@ def test_build_preview_lines_falls_back_to_transcript_lines():
         "SPEAKER_03", ["line1", "line2", "line3"], [], limit=2
     )
     assert previews == ["line1", "line2"]
+
+
+def test_transliterate_to_english_handles_mixed_case_cyrillic():
+    assert sn.transliterate_to_english("ЩУКИН ёжик") == "SHCHUKIN_EZHIK"
+    assert sn.transliterate_to_english("Съезд") == "SEZD"
+
+
+def test_strip_diacritics_removes_common_and_rare_marks():
+    assert sn._strip_diacritics("plain") == "plain"
+    assert sn._strip_diacritics("José Müller") == "Jose Muller"
+    # U+20D7 (combining right arrow above) lives outside the main block.
+    assert sn._strip_diacritics("a⃗b") == "ab"
+
+
+def test_main_writes_named_transcript_and_json(tmp_path, monkeypatch):
+    transcript = tmp_path / "diarized.txt"
+    transcript.write_text(
+        "[00:00:01.000 --> 00:00:02.000] SPEAKER_00: Hello\n"
+        "[00:00:02.000 --> 00:00:03.000] SPEAKER_01: Hi\n",
+        encoding="utf-8",
+    )
+    (tmp_path / "diarized.json").write_text(
+        json.dumps({"segments": [{"speaker": "SPEAKER_00", "start": 1.0, "end": 2.0}]}),
+        encoding="utf-8",
+    )
+    answers = iter(["Анна", "y", "Host", "y"])
+    monkeypatch.setattr("builtins.input", lambda _prompt: next(answers))
+    monkeypatch.setattr("sys.argv", ["speaker_namer", str(transcript)])
+
+    sn.main()
+
+    assert (tmp_path / "NAMED_diarized.txt").read_text(encoding="utf-8") == (
+        "[00:00:01.000 --> 00:00:02.000] ANNA: Hello\n"
+        "[00:00:02.000 --> 00:00:03.000] HOST: Hi\n"
+    )
+    named_json = json.loads((tmp_path / "NAMED_diarized.json").read_text(encoding="utf-8"))
+    assert named_json["segments"][0]["speaker"] == "ANNA"
+
+
+def test_replace_speakers_in_text_leaves_unmapped_and_longer_tags():
+    text = "SPEAKER_01 SPEAKER_02 SPEAKER_011"
+    assert sn.replace_speakers_in_text(text, {}) == text
+    assert (
+        sn.replace_speakers_in_text(text, {"SPEAKER_01": "HOST"})
+        == "HOST SPEAKER_02 SPEAKER_011"
+    )
+
+
+def test_safe_float_coerces_numbers_and_rejects_junk():
+    assert sn._safe_float(0.5) == 0.5
+    assert sn._safe_float(2) == 2.0 and isinstance(sn._safe_float(2), float)
+    assert sn._safe_float("1.25") == 1.25
+    assert sn._safe_float(None) is None
+    assert sn._safe_float("n/a") is None
+    assert sn._safe_float([1]) is None
+
+
+def test_extract_speaker_score_follows_priority_order():
+    assert sn.extract_speaker_score({"score": 0.4, "speaker_prob": 0.9}, "S") == 0.9
+    assert (
+        sn.extract_speaker_score({"speaker_probs": {"S": 0.7}, "confidence": 0.2}, "S")
+        == 0.7
+    )
+    assert sn.extract_speaker_score({"score": "bad", "confidence": 0.3}, "S") == 0.3
+    assert sn.extract_speaker_score({"no_speech_prob": 0.25}, "S") == 0.75
+    assert sn.extract_speaker_score({"start": 1.0, "end": 3.5}, "S") == 2.5
+    assert sn.extract_speaker_score({}, "S") == 0.0
+
+
+def test_main_with_mapping_file_skips_prompts(tmp_path, monkeypatch):
+    transcript = tmp_path / "diarized.txt"
+    transcript.write_text(
+        "[00:00:01.000 --> 00:00:02.000] SPEAKER_00: Hello\n"
+        "[00:00:02.000 --> 00:00:03.000] SPEAKER_01: Hi\n",
+        encoding="utf-8",
+    )
+    mapping_path = tmp_path / "names.json"
+    mapping_path.write_text(json.dumps({"SPEAKER_00": "Иван Петров"}), encoding="utf-8")
+
+    def _no_input(_prompt):
+        raise AssertionError("input() must not be called with --mapping")
+
+    monkeypatch.setattr("builtins.input", _no_input)
+    monkeypatch.setattr(
+        "sys.argv",
+        ["speaker_namer", str(transcript), "--mapping", str(mapping_path)],
+    )
+
+    sn.main()
+
+    assert (tmp_path / "NAMED_diarized.txt").read_text(encoding="utf-8") == (
+        "[00:00:01.000 --> 00:00:02.000] IVAN_PETROV: Hello\n"
+        "[00:00:02.000 --> 00:00:03.000] SPEAKER_01: Hi\n"
+    )
+
+
+def test_load_mapping_file_rejects_non_speaker_keys(tmp_path):
+    for bad in ({"the": "Bob"}, {"": "Ann"}, {"SPEAKER_00 ": "Ann"}):
+        path = tmp_path / "names.json"
+        path.write_text(json.dumps(bad), encoding="utf-8")
+        with pytest.raises(ValueError):
+            sn.load_mapping_file(str(path))
+
+    path.write_text(json.dumps({"SPEAKER_07": "Ann"}), encoding="utf-8")
+    assert sn.load_mapping_file(str(path)) == {"SPEAKER_07": "ANN"}
+
+
+def test_replace_speakers_in_text_refuses_empty_key():
+    with pytest.raises(ValueError):
+        sn.replace_speakers_in_text("SPEAKER_00: the cat", {"": "ANN"})
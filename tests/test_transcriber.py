@@ -1,3 +1,5 @@
+import pytest
+
 import yt_diarizer.transcriber as tr
 
 
@@ -6,6 +8,14 @@ def test_format_timestamp_basic():
     assert tr.format_timestamp(1.234) == "00:00:01.234"
 
 
+def test_format_timestamp_edge_values():
+    assert tr.format_timestamp(None) == "00:00:00.000"
+    assert tr.format_timestamp(-3) == "00:00:00.000"
+    assert tr.format_timestamp("bad") == "00:00:00.000"
+    assert tr.format_timestamp(3723.5) == "01:02:03.500"
+    assert tr.format_timestamp("3723.5") == tr.format_timestamp(3723.5)
+
+
 def test_smooth_speaker_labels_merges_short_outlier_segment():
     segments = [
         {"start": 0.0, "end": 2.0, "speaker": "SPEAKER_00", "text": "hello"},
@@ -18,6 +28,21 @@ def test_smooth_speaker_labels_merges_short_outlier_segment():
     assert all(seg["speaker"] == "SPEAKER_00" for seg in segments)
 
 
+def test_smooth_speaker_labels_sorts_out_of_order_segments():
+    segments = [
+        {"start": 2.4, "end": 5.0, "speaker": "SPEAKER_00", "text": "world"},
+        {"start": 0.0, "end": 2.0, "speaker": "SPEAKER_00", "text": "hello"},
+        {"start": 2.0, "end": 2.4, "speaker": "SPEAKER_01", "text": "да"},
+    ]
+    original = segments
+
+    tr.smooth_speaker_labels(segments, max_short=0.7)
+
+    assert segments is original
+    assert [seg["text"] for seg in segments] == ["hello", "да", "world"]
+    assert all(seg["speaker"] == "SPEAKER_00" for seg in segments)
+
+
 def test_build_diarized_transcript_lines_from_data_uses_smoothed_labels():
     data = {
         "segments": [
@@ -31,46 +56,196 @@ def test_build_diarized_transcript_lines_from_data_uses_smoothed_labels():
     assert all("SPEAKER_00" in line for line in lines)
 
 
-def test_run_whisperx_cli_adds_language_and_speaker_hints(monkeypatch, tmp_path):
+def _run_whisperx(monkeypatch, work_dir, env=None, **kwargs):
+    """Run run_whisperx_cli on a dummy audio file against a fake WhisperX.
+
+    ``env`` values of None unset the variable. The fake writes audio.json like
+    WhisperX does. Returns the WhisperX command, or None when the transcript
+    cache was used instead.
+    """
     invoked_cmds = []
+    json_path = work_dir / "audio.json"
 
-    def _fake_run(cmd, description, env=None):
+    def _fake_run(cmd, description, env=None, tail=None):
         invoked_cmds.append(cmd)
+        json_path.write_text('{"segments": []}')
         return 0, ["ok"]
 
-    monkeypatch.setenv("YT_DIARIZER_LANGUAGE", "ru")
-    monkeypatch.setenv("YT_DIARIZER_MIN_SPEAKERS", "2")
-    monkeypatch.setenv("YT_DIARIZER_MAX_SPEAKERS", "3")
-    monkeypatch.setenv("YT_DIARIZER_INITIAL_PROMPT", "Привет")
-
+    for name, value in (env or {}).items():
+        if value is None:
+            monkeypatch.delenv(name, raising=False)
+        else:
+            monkeypatch.setenv(name, value)
     monkeypatch.setattr(tr, "run_logged_subprocess", _fake_run)
 
-    audio_path = tmp_path / "audio.wav"
-    audio_path.write_text("dummy")
-
-    json_path = tmp_path / "audio.json"
-    json_path.write_text("{}")
+    audio_path = work_dir / "audio.wav"
+    if not audio_path.exists():
+        audio_path.write_bytes(b"RIFF-audio")
+    if json_path.exists():
+        json_path.unlink()
 
+    kwargs.setdefault("whisperx_bin", "whisperx")
     returned = tr.run_whisperx_cli(
+        audio_path=str(audio_path), hf_token="token", work_dir=str(work_dir), **kwargs
+    )
+
+    assert returned == str(json_path)
+    assert json_path.read_text() == '{"segments": []}'
+    return invoked_cmds[0] if invoked_cmds else None
+
+
+def _flag(cmd, name):
+    return cmd[cmd.index(name) + 1]
+
+
+def test_run_whisperx_cli_adds_language_and_speaker_hints(monkeypatch, tmp_path):
+    cmd = _run_whisperx(
+        monkeypatch,
+        tmp_path,
+        env={
+            "YT_DIARIZER_LANGUAGE": "ru",
+            "YT_DIARIZER_MIN_SPEAKERS": "2",
+            "YT_DIARIZER_MAX_SPEAKERS": "3",
+            "YT_DIARIZER_INITIAL_PROMPT": "Привет",
+        },
+    )
+
+    assert _flag(cmd, "--language") == "ru"
+    assert _flag(cmd, "--min_speakers") == "2"
+    assert _flag(cmd, "--max_speakers") == "3"
+    assert _flag(cmd, "--initial_prompt") == "Привет"
+
+
+def test_run_whisperx_cli_uses_batched_inference(monkeypatch, tmp_path):
+    cmd = _run_whisperx(monkeypatch, tmp_path, env={"YT_DIARIZER_BATCH_SIZE": None})
+
+    assert _flag(cmd, "--batch_size") == "16"
+
+
+def test_run_whisperx_cli_batch_size_from_env(monkeypatch, tmp_path):
+    cmd = _run_whisperx(monkeypatch, tmp_path, env={"YT_DIARIZER_BATCH_SIZE": "4"})
+
+    assert _flag(cmd, "--batch_size") == "4"
+
+
+def test_run_whisperx_cli_threads_follow_omp_num_threads(monkeypatch, tmp_path):
+    cmd = _run_whisperx(monkeypatch, tmp_path, env={"OMP_NUM_THREADS": "3"})
+
+    assert _flag(cmd, "--threads") == "3"
+
+
+def test_run_whisperx_cli_uses_float16_on_cuda(monkeypatch, tmp_path):
+    cmd = _run_whisperx(
+        monkeypatch,
+        tmp_path,
+        env={
+            "YT_DIARIZER_DEVICE": "cuda",
+            "YT_DIARIZER_COMPUTE_TYPE": None,
+            "YT_DIARIZER_BEAM_SIZE": None,
+        },
+    )
+
+    assert _flag(cmd, "--device") == "cuda"
+    assert _flag(cmd, "--compute_type") == "float16"
+    assert _flag(cmd, "--beam_size") == "5"
+
+
+def test_run_whisperx_cli_pins_cuda_device_index(monkeypatch, tmp_path):
+    cmd = _run_whisperx(monkeypatch, tmp_path, env={"YT_DIARIZER_DEVICE": "cuda:1"})
+
+    assert _flag(cmd, "--device") == "cuda"
+    assert _flag(cmd, "--device_index") == "1"
+
+
+def test_run_whisperx_cli_compute_type_and_beam_size_from_env(monkeypatch, tmp_path):
+    cmd = _run_whisperx(
+        monkeypatch,
+        tmp_path,
+        env={"YT_DIARIZER_COMPUTE_TYPE": "float32", "YT_DIARIZER_BEAM_SIZE": "5"},
+    )
+
+    assert _flag(cmd, "--compute_type") == "float32"
+    assert _flag(cmd, "--beam_size") == "5"
+
+
+def test_run_whisperx_cli_defaults_to_int8_greedy_on_cpu(monkeypatch, tmp_path):
+    cmd = _run_whisperx(
+        monkeypatch,
+        tmp_path,
+        env={
+            "YT_DIARIZER_DEVICE": None,
+            "YT_DIARIZER_COMPUTE_TYPE": None,
+            "YT_DIARIZER_BEAM_SIZE": None,
+        },
+    )
+
+    assert _flag(cmd, "--device") == "cpu"
+    assert _flag(cmd, "--compute_type") == "int8"
+    assert _flag(cmd, "--beam_size") == "1"
+
+
+def test_run_whisperx_cli_rejects_unknown_compute_type(monkeypatch, tmp_path):
+    with pytest.raises(tr.PipelineError):
+        _run_whisperx(monkeypatch, tmp_path, env={"YT_DIARIZER_COMPUTE_TYPE": "int4"})
+
+
+def test_run_whisperx_cli_falls_back_to_first_visible_json(monkeypatch, tmp_path):
+    monkeypatch.setattr(tr, "run_logged_subprocess", lambda *a, **k: (0, ["ok"]))
+
+    (tmp_path / ".ffmpeg-prepared.json").write_text("{}")
+    (tmp_path / "b.json").write_text("{}")
+    (tmp_path / "a.json").write_text("{}")
+    (tmp_path / "dir.json").mkdir()
+
+    json_path = tr.run_whisperx_cli(
         whisperx_bin="whisperx",
-        audio_path=str(audio_path),
+        audio_path=str(tmp_path / "audio.wav"),
         hf_token="token",
         work_dir=str(tmp_path),
     )
 
-    assert returned == str(json_path)
-    assert invoked_cmds, "Subprocess should have been invoked"
-
-    cmd = invoked_cmds[0]
-    assert "--language" in cmd and "ru" in cmd
-    assert "--min_speakers" in cmd and "2" in cmd
-    assert "--max_speakers" in cmd and "3" in cmd
-    assert "--initial_prompt" in cmd and "Привет" in cmd
-
-    for env_var in [
-        "YT_DIARIZER_LANGUAGE",
-        "YT_DIARIZER_MIN_SPEAKERS",
-        "YT_DIARIZER_MAX_SPEAKERS",
-        "YT_DIARIZER_INITIAL_PROMPT",
-    ]:
-        monkeypatch.delenv(env_var, raising=False)
+    assert json_path == str(tmp_path / "a.json")
+
+
+def test_run_whisperx_cli_reuses_cached_output_for_identical_audio(monkeypatch, tmp_path):
+    work_dir = tmp_path / "work"
+    work_dir.mkdir()
+    cache_dir = str(tmp_path / "cache")
+    waits = []
+
+    assert _run_whisperx(monkeypatch, work_dir, cache_dir=cache_dir) is not None
+    assert (
+        _run_whisperx(
+            monkeypatch, work_dir, cache_dir=cache_dir, before_run=lambda: waits.append(True)
+        )
+        is None
+    )
+    assert waits == []
+
+    cmd = _run_whisperx(
+        monkeypatch, work_dir, env={"YT_DIARIZER_LANGUAGE": "ru"}, cache_dir=cache_dir
+    )
+    assert cmd is not None
+
+
+def test_run_whisperx_cli_cache_ignores_whisperx_binary_path(monkeypatch, tmp_path):
+    work_dir = tmp_path / "work"
+    work_dir.mkdir()
+    cache_dir = tmp_path / "cache"
+
+    first = _run_whisperx(
+        monkeypatch,
+        work_dir,
+        whisperx_bin="/run-1/venv/bin/whisperx",
+        cache_dir=str(cache_dir),
+    )
+    second = _run_whisperx(
+        monkeypatch,
+        work_dir,
+        whisperx_bin="/run-2/venv/bin/whisperx",
+        cache_dir=str(cache_dir),
+    )
+
+    assert first is not None
+    assert second is None
+    assert len(list(cache_dir.iterdir())) == 1
@@ -1,304 +1,91 @@
 """Dependency and download utilities."""
 
-import json
 import os
-import platform
-import shutil
-import sys
-import tarfile
-import zipfile
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional
 
 from .exceptions import DependencyError
-from .logging_utils import debug
-
-
-def _macos_ffmpeg_download() -> Tuple[List[str], str]:
-    """Return candidate URLs and archive name for macOS ffmpeg+ffprobe build."""
-    # Use yt-dlp maintained static builds that include both ffmpeg and ffprobe.
-    arch = platform.machine().lower()
-    is_arm = "arm" in arch or arch == "aarch64"
-
-    # Upstream has recently renamed macOS ARM builds to "apple-silicon" and
-    # occasionally ships "universal" archives that work on both ARM and Intel.
-    # Keep historical and current patterns as fallbacks.
-    base_names = (
-        [
-            "ffmpeg-master-latest-macos-arm64",
-            "ffmpeg-master-latest-macos-apple-silicon",
-            "ffmpeg-master-latest-macos-universal",
-            "ffmpeg-latest-macos-arm64",
-            "ffmpeg-latest-macos-apple-silicon",
-            "ffmpeg-latest-macos-universal",
-        ]
-        if is_arm
-        else [
-            "ffmpeg-master-latest-macos64",
-            "ffmpeg-master-latest-macos-intel",
-            "ffmpeg-master-latest-macos-universal",
-            "ffmpeg-latest-macos64",
-            "ffmpeg-latest-macos-intel",
-            "ffmpeg-latest-macos-universal",
-        ]
-    )
-
-    # Newer releases rotate between "static", "gpl" and "lgpl" flavors and may use
-    # either ZIP or tar.xz archives. Try a handful of plausible names to remain
-    # resilient to upstream filename changes.
-    suffixes = [
-        "-static.zip",
-        "-gpl.zip",
-        "-lgpl.zip",
-        "-gpl.tar.xz",
-        "-lgpl.tar.xz",
-    ]
-    candidate_names = [f"{base}{suffix}" for base in base_names for suffix in suffixes]
-    filename = candidate_names[0]
-
-    # yt-dlp FFmpeg builds expose the latest assets under
-    # `releases/latest/download/<asset>`, but some environments still resolve
-    # `releases/download/latest/<asset>` successfully. Try both to reduce
-    # spurious download failures.
-    api_url = "https://api.github.com/repos/yt-dlp/FFmpeg-Builds/releases/latest"
-    api_urls: List[str] = []
-
-    # Try resolving the latest asset name dynamically via the GitHub API to
-    # avoid breakages when the upstream project rotates filenames.
-    try:
-        import urllib.request
-
-        with urllib.request.urlopen(api_url, timeout=10) as resp:  # type: ignore[attr-defined]
-            data = json.load(resp)
-        assets = data.get("assets") or []
-
-        def _is_arm_build(name: str) -> bool:
-            return any(
-                token in name
-                for token in (
-                    "arm64",
-                    "aarch64",
-                    "apple-silicon",
-                )
-            )
-
-        def _is_universal(name: str) -> bool:
-            return "universal" in name
-
-        for asset in assets:
-            name = asset.get("name", "")
-            if not name.endswith((".zip", ".tar.xz")):
-                continue
-            if "macos" not in name:
-                continue
-            is_asset_arm = _is_arm_build(name)
-            is_asset_universal = _is_universal(name)
-            if not is_asset_universal:
-                if is_asset_arm and not is_arm:
-                    continue
-                if not is_asset_arm and is_arm:
-                    continue
-            if not any(flavor in name for flavor in ("static", "gpl", "lgpl")):
-                continue
-
-            api_urls.append(asset.get("browser_download_url", ""))
-            filename = name
-            # Prefer the first matching asset exposed by the API; others remain
-            # available as fallbacks below.
-            break
-    except Exception as exc:  # pragma: no cover - best effort network call
-        debug(f"Failed to resolve latest ffmpeg asset from GitHub API: {exc}")
-
-    bases = [
-        "https://github.com/yt-dlp/FFmpeg-Builds/releases/latest/download",
-        "https://github.com/yt-dlp/FFmpeg-Builds/releases/download/latest",
-    ]
-
-    fallback_urls = [f"{base}/{name}" for base in bases for name in candidate_names]
-    return [url for url in api_urls + fallback_urls if url], filename
-
-
-def _download_and_extract_archive(urls: List[str], archive_path: str, unpack_dir: str) -> None:
-    import urllib.request
-    from urllib.error import HTTPError, URLError
-
-    attempted_urls: List[str] = []
-    last_error: Optional[Exception] = None
-    for url in urls:
-        debug(f"Downloading ffmpeg binary from {url} ...")
-        attempted_urls.append(url)
-        try:
-            urllib.request.urlretrieve(url, archive_path)
-            break
-        except (HTTPError, URLError) as exc:
-            last_error = exc
-            debug(f"ffmpeg download failed from {url}: {exc}")
-    else:
-        details = (
-            f"Failed to download ffmpeg/ffprobe static build after trying multiple URLs. "
-            f"Tried: {attempted_urls}. "
-            f"Last error: {last_error}"
-        )
-        raise DependencyError(
-            details + "; please check your network connection or provide ffmpeg manually."
-        ) from last_error
-
-    debug(f"Extracting ffmpeg archive to {unpack_dir} ...")
-    try:
-        if archive_path.endswith(".zip"):
-            with zipfile.ZipFile(archive_path, "r") as zf:
-                zf.extractall(unpack_dir)
-        elif archive_path.endswith((".tar.xz", ".tar")):
-            with tarfile.open(archive_path, "r:*") as tf:
-                tf.extractall(unpack_dir)
-        else:
-            raise DependencyError(
-                f"Unsupported ffmpeg archive format for {archive_path}; provide ffmpeg manually."
-            )
-    except Exception as exc:
-        raise DependencyError(
-            f"Failed to extract ffmpeg archive '{archive_path}' to '{unpack_dir}': {exc}"
-        ) from exc
-
-
-def _resolve_manual_ffmpeg() -> Tuple[str, str]:
-    """Return ffmpeg/ffprobe paths from env overrides if set."""
-
-    def _validate(path: str, name: str) -> str:
-        if not path:
-            raise DependencyError(
-                f"Environment override for {name} was provided but is empty."
-            )
-        if not os.path.isfile(path):
-            raise DependencyError(
-                f"Environment override for {name} points to a missing file: {path}"
-            )
-        return path
-
-    def _resolve(value: str, exe_name: str, name: str) -> str:
-        candidate = value
-        if os.path.isdir(value):
-            candidate = os.path.join(value, exe_name)
-        return _validate(candidate, name)
-
-    ffmpeg_env = os.environ.get("YT_DIARIZER_FFMPEG_PATH") or os.environ.get(
-        "YT_DIARIZER_FFMPEG"
-    )
-    ffprobe_env = os.environ.get("YT_DIARIZER_FFPROBE_PATH") or os.environ.get(
-        "YT_DIARIZER_FFPROBE"
-    )
-
-    if not ffmpeg_env and not ffprobe_env:
-        return "", ""
-
-    exe_name = "ffmpeg.exe" if os.name == "nt" else "ffmpeg"
-    probe_name = "ffprobe.exe" if os.name == "nt" else "ffprobe"
-
-    ffmpeg_path = _resolve(ffmpeg_env, exe_name, "YT_DIARIZER_FFMPEG") if ffmpeg_env else ""
-    if ffprobe_env:
-        ffprobe_path = _resolve(ffprobe_env, probe_name, "YT_DIARIZER_FFPROBE")
-    else:
-        # Try locating ffprobe next to ffmpeg if only ffmpeg was provided.
-        if not ffmpeg_path:
-            raise DependencyError(
-                "YT_DIARIZER_FFPROBE must be set when YT_DIARIZER_FFMPEG is not provided."
-            )
-        candidate = os.path.join(os.path.dirname(ffmpeg_path), probe_name)
-        if not os.path.isfile(candidate):
-            raise DependencyError(
-                "YT_DIARIZER_FFMPEG was provided but ffprobe was not found next to it. "
-                "Set YT_DIARIZER_FFPROBE or point to a directory containing both binaries."
-            )
-        ffprobe_path = candidate
-
-    if os.path.dirname(ffmpeg_path) != os.path.dirname(ffprobe_path):
-        raise DependencyError(
-            "Environment overrides for ffmpeg and ffprobe must point to the same directory."
-        )
-
-    return ffmpeg_path, ffprobe_path
-
-
-def _find_binary(unpack_dir: str, name: str) -> str:
-    for root, _, files in os.walk(unpack_dir):
-        if name in files:
-            return os.path.join(root, name)
-    raise DependencyError(
-        f"Downloaded ffmpeg archive but could not find '{name}' binary inside."
-    )
 
 
 def download_ffmpeg_if_missing(work_dir: str) -> str:
     """
-    Ensure ffmpeg + ffprobe are in PATH.
-    If missing, download a macOS static build into work_dir and prepend its bin dir to PATH.
+    Ensure ffmpeg + ffprobe are in PATH and return the ffmpeg binary path.
 
-    Returns the ffmpeg binary path (either existing or downloaded).
+    Kept for backwards compatibility; delegates to
+    :func:`yt_diarizer.pipeline.ensure_ffmpeg`, which handles environment
+    overrides, PATH lookup, cached downloads and per-platform downloads.
     """
-    manual_ffmpeg, manual_ffprobe = _resolve_manual_ffmpeg()
-    if manual_ffmpeg and manual_ffprobe:
-        bin_dir = os.path.dirname(manual_ffmpeg)
-        os.environ["PATH"] = bin_dir + os.pathsep + os.environ.get("PATH", "")
-        debug(
-            "Using ffmpeg/ffprobe from environment overrides "
-            "YT_DIARIZER_FFMPEG(_PATH)/YT_DIARIZER_FFPROBE(_PATH)."
-        )
-        return manual_ffmpeg
-
-    if shutil.which("ffmpeg") and shutil.which("ffprobe"):
-        debug("ffmpeg/ffprobe already available in PATH.")
-        ffmpeg_existing = shutil.which("ffmpeg")
-        assert ffmpeg_existing is not None
-        return ffmpeg_existing
+    from .pipeline import ensure_ffmpeg
 
-    if sys.platform != "darwin":
-        raise DependencyError(
-            "ffmpeg/ffprobe not found and auto-download is only implemented on macOS. "
-            "Install ffmpeg manually or set YT_DIARIZER_FFMPEG / YT_DIARIZER_FFPROBE to "
-            "existing binaries."
-        )
+    try:
+        paths = ensure_ffmpeg(work_dir)
+    except RuntimeError as exc:
+        raise DependencyError(str(exc)) from exc
+    ffmpeg_path = paths["ffmpeg"]
+    assert ffmpeg_path is not None
+    return ffmpeg_path
 
-    ffmpeg_zip_urls, filename = _macos_ffmpeg_download()
-    archive_path = os.path.join(work_dir, filename)
-    unpack_dir = os.path.join(work_dir, "ffmpeg_unpacked")
 
-    _download_and_extract_archive(ffmpeg_zip_urls, archive_path, unpack_dir)
+def which_many(names: Iterable[str]) -> Dict[str, Optional[str]]:
+    """Locate several executables with a single walk over PATH.
 
-    ffmpeg_path = _find_binary(unpack_dir, "ffmpeg")
-    ffprobe_path = _find_binary(unpack_dir, "ffprobe")
+    Equivalent to calling shutil.which for each name, but every PATH entry is
+    visited once and checked for all names instead of once per name.
+    """
+    found: Dict[str, Optional[str]] = {name: None for name in names}
+
+    if os.name == "nt":
+        exts = [ext for ext in os.environ.get("PATHEXT", ".EXE").split(os.pathsep) if ext]
+        candidates = {
+            name: [name] if os.path.splitext(name)[1] else [name + ext for ext in exts]
+            for name in found
+        }
+    else:
+        candidates = {name: [name] for name in found}
 
-    for binary_path in (ffmpeg_path, ffprobe_path):
-        try:
-            os.chmod(binary_path, 0o755)
-        except Exception:
-            # Best-effort; if chmod fails but it's already executable, that's fine.
-            pass
+    for directory in os.environ.get("PATH", "").split(os.pathsep):
+        if not directory:
+            continue
+        for name, filenames in candidates.items():
+            if found[name] is not None:
+                continue
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                if os.access(path, os.X_OK) and os.path.isfile(path):
+                    found[name] = path
+                    break
+        if all(path is not None for path in found.values()):
+            break
 
-    bin_dir = os.path.dirname(ffmpeg_path)
-    os.environ["PATH"] = bin_dir + os.pathsep + os.environ.get("PATH", "")
-    debug(f"Using downloaded ffmpeg at {ffmpeg_path}")
-    return ffmpeg_path
+    return found
 
 
-def find_executable(candidates: List[str]) -> str:
-    """Return first executable found in PATH from the list, or raise."""
+def _first_found(resolved: Dict[str, Optional[str]], candidates: List[str]) -> str:
     for name in candidates:
-        path = shutil.which(name)
+        path = resolved.get(name)
         if path:
             return path
     raise DependencyError(f"Executables not found: {', '.join(candidates)}")
 
 
+def find_executable(candidates: List[str]) -> str:
+    """Return first executable found in PATH from the list, or raise."""
+    return _first_found(which_many(candidates), candidates)
+
+
 def ensure_dependencies() -> Dict[str, str]:
     """Ensure ffmpeg, yt-dlp and whisperx CLIs are available in PATH."""
+    downloader_names = ["yt-dlp", "yt_dlp"]
+    resolved = which_many(["ffmpeg", "ffprobe", "whisperx"] + downloader_names)
+
     deps: Dict[str, str] = {}
-    ffmpeg_path = shutil.which("ffmpeg")
-    ffprobe_path = shutil.which("ffprobe")
+    ffmpeg_path = resolved["ffmpeg"]
+    ffprobe_path = resolved["ffprobe"]
     if not ffmpeg_path or not ffprobe_path:
         raise DependencyError(
             "ffmpeg/ffprobe executables not found in PATH even after attempted download."
         )
     deps["ffmpeg"] = ffmpeg_path
     deps["ffprobe"] = ffprobe_path
-    deps["yt_downloader"] = find_executable(["yt-dlp", "yt_dlp"])
-    deps["whisperx"] = find_executable(["whisperx"])
+    deps["yt_downloader"] = _first_found(resolved, downloader_names)
+    deps["whisperx"] = _first_found(resolved, ["whisperx"])
     return deps
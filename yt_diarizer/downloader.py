@@ -15,10 +15,15 @@ def build_yt_dlp_command_variants(
     work_dir: str,
     script_dir: str,
     ffmpeg_location: Optional[str] = None,
+    ffmpeg_args: Optional[List[str]] = None,
 ) -> List[List[str]]:
     """
     Build a list of yt-dlp command variants to try.
 
+    When *ffmpeg_args* is given, the audio is extracted to WAV and the args are
+    applied to yt-dlp's ffmpeg output, so the conversion happens in the same
+    ffmpeg pass as the demux.
+
     Order:
       1) plain public download
       2) with cookies from cookies.txt / YT_DIARIZER_COOKIES (if present)
@@ -50,6 +55,17 @@ def build_yt_dlp_command_variants(
     if ffmpeg_location:
         base_cmd.extend(["--ffmpeg-location", ffmpeg_location])
 
+    if ffmpeg_args:
+        base_cmd.extend(
+            [
+                "-x",
+                "--audio-format",
+                "wav",
+                "--postprocessor-args",
+                "ExtractAudio+ffmpeg_o:" + " ".join(ffmpeg_args),
+            ]
+        )
+
     commands: List[List[str]] = []
 
     # 1) plain
@@ -83,26 +99,30 @@ def download_best_audio(
     work_dir: str,
     script_dir: str,
     ffmpeg_location: Optional[str],
+    ffmpeg_args: Optional[List[str]] = None,
 ) -> str:
     """
-    Use yt-dlp to grab the best available audio without re-encoding.
+    Use yt-dlp to grab the best available audio.
+
+    Without *ffmpeg_args* the audio is kept as downloaded (no re-encoding);
+    with them it is converted to WAV in one ffmpeg pass.
 
     Tries multiple strategies and raises a detailed error if all fail.
     """
     debug("Starting audio download via yt-dlp...")
     commands = build_yt_dlp_command_variants(
-        downloader_bin, url, work_dir, script_dir, ffmpeg_location
+        downloader_bin, url, work_dir, script_dir, ffmpeg_location, ffmpeg_args
     )
     last_err_msg: Optional[str] = None
 
     for idx, cmd in enumerate(commands, start=1):
         debug(f"Trying yt-dlp variant #{idx}: {' '.join(cmd)}")
-        rc, lines = run_logged_subprocess(cmd, f"yt-dlp variant #{idx}")
+        rc, lines = run_logged_subprocess(cmd, f"yt-dlp variant #{idx}", tail=50)
         if rc == 0:
             debug("yt-dlp download succeeded.")
             break
 
-        snippet = "\n".join([ln for ln in lines if ln][-50:])
+        snippet = "\n".join(lines)
         last_err_msg = f"yt-dlp exited with code {rc}. Last output snippet:\n{snippet}"
         debug(last_err_msg)
     else:
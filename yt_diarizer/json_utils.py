@@ -0,0 +1,58 @@
+"""JSON file helpers that use orjson when it is installed."""
+
+import json
+import math
+from typing import Any
+
+try:  # optional: much faster parsing/serializing of large WhisperX outputs
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+
+def load_json(path: str) -> Any:
+    """Parse a UTF-8 JSON file."""
+    with open(path, "rb") as f:
+        raw = f.read()
+    if orjson is not None:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            # orjson is strict; the stdlib also accepts NaN/Infinity, which
+            # json.dump emits for non-finite scores.
+            pass
+    return json.loads(raw.decode("utf-8"))
+
+
+def _has_non_finite(data: Any) -> bool:
+    """Return True if ``data`` holds a NaN or infinite float anywhere."""
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, float):
+            if not math.isfinite(value):
+                return True
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+    return False
+
+
+def dump_json(data: Any, path: str, buffering: int = -1) -> None:
+    """Write ``data`` as UTF-8 JSON indented by two spaces."""
+    # orjson writes NaN/Infinity as null and rejects integers beyond 64 bits;
+    # the stdlib keeps both, matching what load_json() accepts.
+    if orjson is not None and not _has_non_finite(data):
+        try:
+            payload_bytes = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+        except (orjson.JSONEncodeError, TypeError):
+            pass
+        else:
+            with open(path, "wb", buffering=buffering) as f:
+                f.write(payload_bytes)
+            return
+    # json.dump() issues one write() per token; serialize first and write once.
+    payload = json.dumps(data, ensure_ascii=False, indent=2)
+    with open(path, "w", encoding="utf-8", buffering=buffering) as f:
+        f.write(payload)
@@ -20,7 +20,6 @@ from .exceptions import (
 )
 from .logging_utils import debug, log_line, set_log_file
 from .pipeline import (
-    ensure_pkg_config_available,
     run_pipeline_inside_venv,
     setup_and_run_in_venv,
 )
@@ -97,8 +96,6 @@ def main(script_dir: Optional[str] = None, entrypoint_path: Optional[str] = None
         if args.max_speakers is not None:
             os.environ.setdefault("YT_DIARIZER_MAX_SPEAKERS", str(args.max_speakers))
 
-        ensure_pkg_config_available()
-
     if stage == "inner":
         # Inner stage: workspace and venv already set up.
         work_dir = os.environ.get(ENV_WORKDIR_VAR)
@@ -1,26 +1,34 @@
 """High-level orchestration for the diarization pipeline."""
 
+import errno
+import hashlib
+import importlib.util
+import json
 import os
 import platform
 import re
 import shutil
-import stat
 import subprocess
 import sys
 import tarfile
+import threading
+import venv
 import zipfile
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import Callable, Dict, List, Optional, Tuple, Union
-from urllib.parse import parse_qs, urlparse
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+from urllib.parse import unquote_plus, urlparse
 
 from .constants import (
+    ENV_FFMPEG_DIR_VAR,
     ENV_MPS_CONVERT_VAR,
     ENV_STAGE_VAR,
     ENV_URL_VAR,
     ENV_WORKDIR_VAR,
     TOKEN_FILENAME,
 )
-from .deps import ensure_dependencies, find_executable
+from .deps import ensure_dependencies, find_executable, which_many
 from .downloader import download_best_audio
 from .exceptions import (
     DependencyError,
@@ -38,7 +46,7 @@ def _token_search_paths(script_dir: str) -> List[str]:
     script_dir = os.path.abspath(script_dir)
     candidates.append(script_dir)
 
-    parent_dir = os.path.abspath(os.path.join(script_dir, os.pardir))
+    parent_dir = os.path.dirname(script_dir)
     if os.path.basename(script_dir) == "yt_diarizer" and parent_dir not in candidates:
         candidates.insert(0, parent_dir)
 
@@ -46,15 +54,26 @@ def _token_search_paths(script_dir: str) -> List[str]:
 
 
 def load_hf_token(script_dir: str) -> str:
-    """Load Hugging Face token, preferring the repository root when run as a module."""
+    """Load Hugging Face token, preferring the repository root when run as a module.
+
+    A non-empty ``HF_TOKEN`` in the environment wins and skips the file lookup.
+    """
+
+    env_token = os.environ.get("HF_TOKEN", "").strip()
+    if env_token:
+        debug("Using Hugging Face token from HF_TOKEN environment variable.")
+        return env_token
 
     for token_path in _token_search_paths(script_dir):
-        if os.path.isfile(token_path):
+        # Open directly instead of stat-then-open: one syscall, no TOCTOU gap.
+        try:
             with open(token_path, "r", encoding="utf-8") as f:
                 token = f.read().strip()
-            if not token:
-                raise DependencyError("token.txt is empty.")
-            return token
+        except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
+            continue
+        if not token:
+            raise DependencyError("token.txt is empty.")
+        return token
 
     raise DependencyError(
         "token.txt not found. Place it in the repository root next to yt_diarizer.py "
@@ -62,28 +81,147 @@ def load_hf_token(script_dir: str) -> str:
     )
 
 
+def _probe_hf_model(token: str, repo: str = "pyannote/speaker-diarization-3.1") -> None:
+    """Fail fast when the token cannot access the gated diarization model.
+
+    A HEAD request against the model's config file returns 401/403 when the
+    token is invalid or the model license has not been accepted, which would
+    otherwise only surface after audio download and transcription. Network
+    errors are logged and ignored so offline caches keep working.
+    """
+    import urllib.request
+    from urllib.error import HTTPError, URLError
+
+    url = f"https://huggingface.co/{repo}/resolve/main/config.yaml"
+    request = urllib.request.Request(
+        url, headers={"Authorization": f"Bearer {token}"}, method="HEAD"
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=10):
+            pass
+    except HTTPError as exc:
+        if exc.code in (401, 403):
+            raise DependencyError(
+                f"Hugging Face token was rejected for {repo} (HTTP {exc.code}). "
+                f"Check token.txt and accept the model license at https://huggingface.co/{repo}."
+            ) from exc
+        debug(f"Hugging Face model probe for {repo} returned HTTP {exc.code}; continuing.")
+    except (URLError, TimeoutError, OSError) as exc:
+        debug(f"Hugging Face model probe for {repo} failed: {exc}; continuing.")
+    else:
+        debug(f"Hugging Face token has access to {repo}.")
+
+
 def _configure_cache_dirs(work_dir: str) -> None:
-    """Point cache-related env vars into the workspace for automatic cleanup."""
+    """Configure model cache locations.
+
+    By default Hugging Face, Transformers, pyannote and Torch keep their
+    standard per-user caches (~/.cache/huggingface, ~/.cache/torch, ...), so
+    the multi-GB WhisperX and diarization models are downloaded only once.
+    With YT_DIARIZER_EPHEMERAL_CACHE=1 the model caches are redirected into
+    the workspace instead and removed together with it. XDG_CACHE_HOME is left
+    alone so that _user_cache_dir() (ffmpeg downloads, venvs) stays persistent.
+    """
 
-    cache_root = os.path.join(work_dir, "cache")
-    os.makedirs(cache_root, exist_ok=True)
+    if os.environ.get("YT_DIARIZER_EPHEMERAL_CACHE"):
+        cache_root = os.path.join(work_dir, "cache")
+        os.makedirs(cache_root, exist_ok=True)
+
+        effective: Dict[str, str] = {}
+        for env_var, subdir in (
+            ("HF_HOME", "hf"),
+            ("TRANSFORMERS_CACHE", "transformers"),
+            ("PYANNOTE_CACHE", "pyannote"),
+            ("TORCH_HOME", "torch"),
+        ):
+            # Empty values count as unset, matching how the libraries read them.
+            value = os.environ.get(env_var) or os.path.join(cache_root, subdir)
+            os.environ[env_var] = effective[env_var] = value
 
-    defaults = {
-        "HF_HOME": os.path.join(cache_root, "hf"),
-        "TRANSFORMERS_CACHE": os.path.join(cache_root, "transformers"),
-        "XDG_CACHE_HOME": cache_root,
-        "PYANNOTE_CACHE": os.path.join(cache_root, "pyannote"),
-        "TORCH_HOME": os.path.join(cache_root, "torch"),
-    }
+        debug(
+            "Caching directories redirected to workspace for cleanup: "
+            + ", ".join(f"{k}={v}" for k, v in effective.items())
+        )
+    else:
+        debug("Using persistent per-user model caches (~/.cache/huggingface, ~/.cache/torch).")
 
-    for env_var, path in defaults.items():
-        if not os.environ.get(env_var):
-            os.environ[env_var] = path
+    # Download Hugging Face models over hf_transfer's parallel connections.
+    # huggingface_hub errors out if the flag is set without the package, so
+    # only enable it when it is importable (it is not on the MPS stack).
+    os.environ.setdefault("HF_HUB_DOWNLOAD_TIMEOUT", "60")
+    if importlib.util.find_spec("hf_transfer") is not None:
+        os.environ.setdefault("HF_HUB_ENABLE_HF_TRANSFER", "1")
 
-    debug(
-        "Caching directories redirected to workspace for cleanup: "
-        + ", ".join(f"{k}={os.environ[k]}" for k in defaults)
-    )
+
+def _physical_cpu_count() -> int:
+    """Best-effort count of physical cores, falling back to logical CPUs."""
+    logical = os.cpu_count() or 1
+
+    if sys.platform == "darwin":
+        try:
+            out = subprocess.run(
+                ["sysctl", "-n", "hw.physicalcpu"],
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout
+            return max(1, int(out.strip()))
+        except (OSError, subprocess.CalledProcessError, ValueError):
+            return logical
+
+    try:
+        with open("/proc/cpuinfo", "r", encoding="utf-8") as f:
+            cores = set()
+            physical_id = core_id = None
+            for line in f:
+                key, _, value = line.partition(":")
+                key = key.strip()
+                if key == "physical id":
+                    physical_id = value.strip()
+                elif key == "core id":
+                    core_id = value.strip()
+                elif not key:
+                    if core_id is not None:
+                        cores.add((physical_id, core_id))
+                    physical_id = core_id = None
+            if core_id is not None:
+                cores.add((physical_id, core_id))
+    except OSError:
+        return logical
+
+    return len(cores) if cores else logical
+
+
+def _configure_cpu_threads() -> None:
+    """Size the OpenMP/MKL thread pools to physical cores.
+
+    Running one BLAS thread per hyperthread makes sibling threads fight over
+    the same core for GEMM work. The value is exported before WhisperX starts
+    and also used for its --threads flag; explicit user settings win.
+    """
+    threads = str(_physical_cpu_count())
+    os.environ.setdefault("OMP_NUM_THREADS", threads)
+    os.environ.setdefault("MKL_NUM_THREADS", os.environ["OMP_NUM_THREADS"])
+    debug(f"CPU inference threads: {os.environ['OMP_NUM_THREADS']}")
+
+
+def _configure_inference_device() -> None:
+    """Default YT_DIARIZER_DEVICE to cuda when this interpreter's torch sees a GPU.
+
+    Runs in the inner stage, so provisioned venvs and in-process runs
+    (prebuilt images, YT_DIARIZER_SKIP_VENV=1) are detected the same way.
+    torch is only imported when an NVIDIA driver is installed, which keeps
+    CPU-only hosts from paying for the import twice.
+    """
+    if os.environ.get("YT_DIARIZER_DEVICE") or not shutil.which("nvidia-smi"):
+        return
+    try:
+        import torch
+    except ImportError:
+        return
+    if torch.cuda.is_available():
+        os.environ["YT_DIARIZER_DEVICE"] = "cuda"
+        debug("CUDA is available to torch; running WhisperX on the GPU.")
 
 
 def prompt_for_youtube_url() -> str:
@@ -103,23 +241,35 @@ def _resolve_youtube_url() -> str:
     return prompt_for_youtube_url()
 
 
+# Runs of characters outside [A-Za-z0-9._-], together with any underscores
+# they touch, collapse to a single "_" in one pass.
+_UNSAFE_RUN_RE = re.compile(r"[^A-Za-z0-9.-]+")
+
+
 def _build_output_base_name_from_url(url: str) -> str:
     """Derive a filesystem-friendly base name from the provided YouTube URL."""
 
-    parsed = urlparse(url.strip())
-    if not parsed.scheme:
-        parsed = urlparse(f"https://{url.strip()}")
+    stripped = url.strip()
+    if "://" not in stripped:
+        stripped = f"https://{stripped}"
+    parsed = urlparse(stripped)
 
     parts: List[str] = []
 
     if parsed.netloc:
         parts.append(parsed.netloc)
 
-    query = parse_qs(parsed.query)
-    video_id = None
-    if query.get("v") and query["v"][0]:
-        video_id = query["v"][0]
-    elif parsed.path:
+    # Only "v" matters, so pick it out directly instead of building the full
+    # parse_qs dict of lists (first non-empty value wins, as with parse_qs).
+    video_id = next(
+        (
+            unquote_plus(field[2:])
+            for field in parsed.query.split("&")
+            if field.startswith("v=") and len(field) > 2
+        ),
+        None,
+    )
+    if not video_id and parsed.path:
         path_parts = [segment for segment in parsed.path.split("/") if segment]
         if path_parts:
             video_id = path_parts[-1]
@@ -134,14 +284,16 @@ def _build_output_base_name_from_url(url: str) -> str:
         parts.append("video")
 
     raw_name = "_".join(parts)
-    safe_name = re.sub(r"[^A-Za-z0-9._-]", "_", raw_name)
-    safe_name = re.sub(r"_+", "_", safe_name).strip("._-")
+    safe_name = _UNSAFE_RUN_RE.sub("_", raw_name).strip("._-")
     if not safe_name:
         safe_name = "video"
 
     return f"diarized_transcript_{safe_name}"
 
 
+_TXT_WRITE_CHUNK_LINES = 8192
+
+
 def save_final_outputs(
     transcript_lines: List[str],
     json_path: str,
@@ -159,11 +311,23 @@ def save_final_outputs(
     txt_path = os.path.join(script_dir, base_name + ".txt")
     json_target = os.path.join(script_dir, base_name + ".json")
 
-    with open(txt_path, "w", encoding="utf-8") as f:
-        for line in transcript_lines:
-            f.write(line + "\n")
+    # A few large writes instead of a write (and a string concat) per line.
+    # Joining in slices keeps the transient string bounded for very long
+    # transcripts; newline="\n" writes the same bytes on every platform.
+    with open(txt_path, "w", encoding="utf-8", newline="\n", buffering=1 << 20) as f:
+        for start in range(0, len(transcript_lines), _TXT_WRITE_CHUNK_LINES):
+            f.write("\n".join(transcript_lines[start : start + _TXT_WRITE_CHUNK_LINES]))
+            f.write("\n")
 
-    shutil.move(json_path, json_target)
+    # A rename is atomic and moves no bytes; only copy when the workspace lives
+    # on a different filesystem than script_dir.
+    try:
+        os.replace(json_path, json_target)
+    except OSError as exc:
+        if exc.errno != errno.EXDEV:
+            raise
+        shutil.copyfile(json_path, json_target)
+        os.unlink(json_path)
 
     debug(f"Saved TXT transcript to {txt_path}")
     debug(f"Saved JSON output to {json_target}")
@@ -204,13 +368,80 @@ def ensure_pkg_config_available() -> None:
     )
 
 
-def install_python_dependencies(venv_python: str, mps_convert: bool = False) -> None:
+PINNED_VERSIONS = {
+    # WhisperX 3.7.4 currently expects torch/torchaudio 2.8 and numpy ~=2.0.
+    # Keep these in sync with the WhisperX version below.
+    "numpy": "2.0.2",
+    "torch": "2.8.0",
+    "torchaudio": "2.8.0",
+    "whisperx": "3.7.4",
+    "whisper": "20240930",
+    "yt-dlp": "2024.11.18",
+    "hf_transfer": "0.1.8",
+    "uv": "0.5.11",
+}
+
+
+TORCH_CPU_INDEX = "https://download.pytorch.org/whl/cpu"
+
+# CUDA wheel indexes published for the pinned torch, newest first, with the
+# minimum driver CUDA version each one needs.
+TORCH_CUDA_INDEXES = [
+    ((12, 8), "https://download.pytorch.org/whl/cu128"),
+    ((12, 6), "https://download.pytorch.org/whl/cu126"),
+]
+
+
+def _select_torch_index() -> str:
+    """Pick the PyTorch wheel index for this host.
+
+    YT_DIARIZER_TORCH_INDEX wins when set. Otherwise the CUDA version reported
+    by nvidia-smi selects the newest compatible CUDA index, falling back to
+    CPU wheels when there is no NVIDIA driver or it is too old.
+    """
+    override = os.environ.get("YT_DIARIZER_TORCH_INDEX")
+    if override:
+        debug(f"Using PyTorch index from YT_DIARIZER_TORCH_INDEX: {override}")
+        return override
+
+    nvidia_smi = shutil.which("nvidia-smi")
+    if not nvidia_smi:
+        return TORCH_CPU_INDEX
+
+    try:
+        out = subprocess.run(
+            [nvidia_smi], capture_output=True, text=True, check=True, timeout=10
+        ).stdout
+    except (OSError, subprocess.SubprocessError) as exc:
+        debug(f"nvidia-smi failed ({exc}); using CPU PyTorch wheels.")
+        return TORCH_CPU_INDEX
+
+    match = re.search(r"CUDA Version:\s*(\d+)\.(\d+)", out)
+    if not match:
+        return TORCH_CPU_INDEX
+
+    driver_cuda = (int(match.group(1)), int(match.group(2)))
+    for min_cuda, index in TORCH_CUDA_INDEXES:
+        if driver_cuda >= min_cuda:
+            debug(f"NVIDIA driver supports CUDA {driver_cuda[0]}.{driver_cuda[1]}; using {index}")
+            return index
+
+    debug(
+        f"NVIDIA driver CUDA {driver_cuda[0]}.{driver_cuda[1]} is too old for "
+        f"torch {PINNED_VERSIONS['torch']}; using CPU PyTorch wheels."
+    )
+    return TORCH_CPU_INDEX
+
+
+def install_python_dependencies(
+    venv_python: str, mps_convert: bool = False, torch_index: str = TORCH_CPU_INDEX
+) -> None:
     """
     Install required Python packages into the venv.
 
     When *mps_convert* is True we install a Whisper-only stack suitable for
     Apple Silicon (MPS) transcription without diarization. Otherwise we install
-    the default WhisperX stack.
+    the default WhisperX stack, taking torch from *torch_index*.
     """
     stack_label = "Whisper (MPS)" if mps_convert else "WhisperX"
     debug(f"Installing Python dependencies ({stack_label} stack) inside venv ...")
@@ -218,23 +449,15 @@ def install_python_dependencies(venv_python: str, mps_convert: bool = False) ->
     # On macOS, PyAV may require pkg-config to be present; we keep this preflight.
     ensure_pkg_config_available()
 
-    pinned_versions = {
-        # WhisperX 3.7.4 currently expects torch/torchaudio 2.8 and numpy ~=2.0.
-        # Keep these in sync with the WhisperX version above.
-        "numpy": "2.0.2",
-        "torch": "2.8.0",
-        "torchaudio": "2.8.0",
-        "whisperx": "3.7.4",
-        "whisper": "20240930",
-        "yt-dlp": "2024.11.18",
-    }
+    pinned_versions = PINNED_VERSIONS
 
     venv_dir = os.path.dirname(os.path.dirname(venv_python))
     pip_env = os.environ.copy()
     pip_env.setdefault("VIRTUAL_ENV", venv_dir)
     pip_env["PYTHONNOUSERSITE"] = "1"
     pip_env["PIP_DISABLE_PIP_VERSION_CHECK"] = "1"
-    pip_env["PIP_NO_CACHE_DIR"] = "1"
+    # pip and uv keep their default per-user wheel caches, so rebuilding a venv
+    # (new pins, new interpreter) does not re-download torch and friends.
 
     def _run(cmd: List[str], description: str) -> None:
         rc, log_lines = run_logged_subprocess(cmd, description, env=pip_env)
@@ -245,80 +468,68 @@ def install_python_dependencies(venv_python: str, mps_convert: bool = False) ->
                 f"Last output snippet:\n{last_snippet}"
             )
 
-    # Upgrade pip first to get a modern dependency resolver.
+    # uv resolves and downloads in parallel and is much faster than pip, so the
+    # venv's bundled pip is only used to bootstrap it (no pip upgrade needed).
     _run(
         [
             venv_python,
             "-m",
             "pip",
             "install",
-            "--upgrade",
-            "pip",
+            f"uv=={pinned_versions['uv']}",
         ],
-        "pip upgrade",
+        "bootstrap uv installer",
     )
 
-    # Install numpy at a version compatible with the pinned WhisperX stack.
-    _run(
-        [
-            venv_python,
-            "-m",
-            "pip",
-            "install",
-            f"numpy=={pinned_versions['numpy']}",
-        ],
-        "install numpy for WhisperX dependencies",
-    )
-
-    torch_cmd = [
+    install_cmd = [
         venv_python,
         "-m",
+        "uv",
         "pip",
         "install",
+        "--python",
+        venv_python,
+        f"numpy=={pinned_versions['numpy']}",
         f"torch=={pinned_versions['torch']}",
         f"torchaudio=={pinned_versions['torchaudio']}",
+        f"yt-dlp=={pinned_versions['yt-dlp']}",
     ]
-    if not mps_convert:
-        torch_cmd.extend(["--index-url", "https://download.pytorch.org/whl/cpu"])
-
-    _run(torch_cmd, "install PyTorch wheels")
 
+    # A single resolve covers numpy, PyTorch and the transcription stack.
     if mps_convert:
-        _run(
-            [
-                venv_python,
-                "-m",
-                "pip",
-                "install",
-                f"openai-whisper=={pinned_versions['whisper']}",
-                f"yt-dlp=={pinned_versions['yt-dlp']}",
-            ],
-            "install Whisper (MPS) transcription dependencies",
-        )
+        install_cmd.append(f"openai-whisper=={pinned_versions['whisper']}")
+        _run(install_cmd, "install Whisper (MPS) transcription dependencies")
     else:
-        _run(
+        install_cmd.extend(
             [
-                venv_python,
-                "-m",
-                "pip",
-                "install",
                 f"whisperx=={pinned_versions['whisperx']}",
-                f"yt-dlp=={pinned_versions['yt-dlp']}",
-            ],
-            "install WhisperX, yt-dlp and supporting dependencies",
+                f"hf_transfer=={pinned_versions['hf_transfer']}",
+                # CPU or CUDA torch wheels; whisperx and friends still come from PyPI.
+                "--extra-index-url",
+                torch_index,
+                "--index-strategy",
+                "unsafe-best-match",
+            ]
         )
+        _run(install_cmd, "install WhisperX, PyTorch, yt-dlp and supporting dependencies")
 
 
 # ---------------------------------------------------------------------------
 # ffmpeg resolution order:
 # 1) YT_DIARIZER_FFMPEG / YT_DIARIZER_FFPROBE environment overrides
 # 2) Existing ffmpeg/ffprobe on PATH
-# 3) macOS: download from the previously working ColorsWind GitHub release
-# 4) Linux/Windows: download from yt-dlp/FFmpeg-Builds
+# 3) Binaries downloaded by a previous run (~/.cache/yt_diarizer/ffmpeg.json)
+# 4) Binaries already prepared in this workspace (.ffmpeg-prepared.json)
+# 5) macOS: download from the previously working ColorsWind GitHub release
+# 6) Linux/Windows: download from yt-dlp/FFmpeg-Builds
 # If downloads fail, instruct the user to install ffmpeg manually or set env vars.
 # ---------------------------------------------------------------------------
 
 
+# GitHub release redirects occasionally reject urllib's default User-Agent.
+_DOWNLOAD_USER_AGENT = "yt-diarizer/1.0"
+
+
 def _log_error(message: str) -> None:
     """Log errors consistently using the debug logger."""
 
@@ -348,6 +559,19 @@ def _ffmpeg_from_env() -> Optional[Dict[str, str]]:
             candidate = value
         return _validate_binary(candidate, f"Environment override for {exe_name}")
 
+    exe_name = "ffmpeg.exe" if os.name == "nt" else "ffmpeg"
+    probe_name = "ffprobe.exe" if os.name == "nt" else "ffprobe"
+
+    # The outer stage resolves ffmpeg while the venv is being built and hands
+    # the directory down so the inner stage does not repeat the work.
+    prepared_dir = os.environ.get(ENV_FFMPEG_DIR_VAR)
+    if prepared_dir:
+        prepared_ffmpeg = os.path.join(prepared_dir, exe_name)
+        prepared_ffprobe = os.path.join(prepared_dir, probe_name)
+        if os.path.isfile(prepared_ffmpeg) and os.path.isfile(prepared_ffprobe):
+            debug(f"Using ffmpeg prepared by the outer stage: {prepared_ffmpeg}")
+            return {"ffmpeg": prepared_ffmpeg, "ffprobe": prepared_ffprobe}
+
     ffmpeg_env = os.environ.get("YT_DIARIZER_FFMPEG") or os.environ.get(
         "YT_DIARIZER_FFMPEG_PATH"
     )
@@ -358,9 +582,6 @@ def _ffmpeg_from_env() -> Optional[Dict[str, str]]:
     if not ffmpeg_env and not ffprobe_env:
         return None
 
-    exe_name = "ffmpeg.exe" if os.name == "nt" else "ffmpeg"
-    probe_name = "ffprobe.exe" if os.name == "nt" else "ffprobe"
-
     ffmpeg_path = _resolve_path(ffmpeg_env, exe_name) if ffmpeg_env else ""
 
     if ffprobe_env:
@@ -392,8 +613,9 @@ def _ffmpeg_from_env() -> Optional[Dict[str, str]]:
 
 
 def _ffmpeg_from_path() -> Optional[Dict[str, str]]:
-    ffmpeg_path = shutil.which("ffmpeg")
-    ffprobe_path = shutil.which("ffprobe")
+    resolved = which_many(("ffmpeg", "ffprobe"))
+    ffmpeg_path = resolved["ffmpeg"]
+    ffprobe_path = resolved["ffprobe"]
     if ffmpeg_path and ffprobe_path:
         debug(
             "Using ffmpeg/ffprobe from system PATH: "
@@ -403,23 +625,184 @@ def _ffmpeg_from_path() -> Optional[Dict[str, str]]:
     return None
 
 
+def _zip_member_target(unpack_dir: str, member_name: str) -> Optional[str]:
+    """Map a zip member name to a path under unpack_dir, like ZipFile.extract.
+
+    Drive letters, absolute prefixes and ``.``/``..`` components are dropped so
+    members cannot escape the destination directory.
+    """
+    arcname = member_name.replace("/", os.path.sep)
+    if os.path.altsep:
+        arcname = arcname.replace(os.path.altsep, os.path.sep)
+    arcname = os.path.splitdrive(arcname)[1]
+    parts = [part for part in arcname.split(os.path.sep) if part not in ("", ".", "..")]
+    if not parts:
+        return None
+    return os.path.join(unpack_dir, *parts)
+
+
+def _extract_zip_parallel(archive_path: str, unpack_dir: str) -> None:
+    """Extract a zip archive using one worker thread per CPU.
+
+    Each member is deflated independently, so members are spread across a
+    thread pool; zlib releases the GIL while inflating. Every worker keeps its
+    own ZipFile handle because a shared handle serializes reads on its file
+    position. Directories are created up front to avoid makedirs races.
+    """
+    with zipfile.ZipFile(archive_path, "r") as zf:
+        infos = zf.infolist()
+
+    jobs: List[Tuple[zipfile.ZipInfo, str]] = []
+    for info in infos:
+        target = _zip_member_target(unpack_dir, info.filename)
+        if target is None:
+            continue
+        if info.is_dir():
+            os.makedirs(target, exist_ok=True)
+        else:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            jobs.append((info, target))
+
+    local = threading.local()
+    handles: List[zipfile.ZipFile] = []
+    handles_lock = threading.Lock()
+
+    def _extract_one(job: Tuple[zipfile.ZipInfo, str]) -> None:
+        handle = getattr(local, "zf", None)
+        if handle is None:
+            handle = zipfile.ZipFile(archive_path, "r")
+            local.zf = handle
+            with handles_lock:
+                handles.append(handle)
+        info, target = job
+        with handle.open(info) as src, open(target, "wb") as dst:
+            shutil.copyfileobj(src, dst, 1 << 20)
+
+    try:
+        with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as pool:
+            list(pool.map(_extract_one, jobs))
+    finally:
+        for handle in handles:
+            handle.close()
+
+
+def _rank_download_urls(
+    urls: List[str], min_size: int = 1_000_000, overall_timeout: float = 10.0
+) -> List[str]:
+    """Move mirrors that answer a HEAD request with a plausible archive to the front.
+
+    All candidates are probed concurrently, so a dead release asset costs one
+    short HEAD timeout instead of a full download timeout. Probing stops as
+    soon as the earliest reachable mirror is known, and never waits longer
+    than ``overall_timeout``: mirrors still pending then keep their original
+    order behind the ones that answered. Unreachable URLs stay at the end as a
+    last resort.
+    """
+    import time
+    import urllib.request
+
+    if len(urls) < 2:
+        return list(urls)
+
+    def _probe(url: str) -> bool:
+        request = urllib.request.Request(
+            url, headers={"User-Agent": _DOWNLOAD_USER_AGENT}, method="HEAD"
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=5) as response:
+                length = int(response.headers.get("Content-Length") or 0)
+                return response.status == 200 and length > min_size
+        except (OSError, ValueError):
+            return False
+
+    results: Dict[int, bool] = {}
+
+    def _settled() -> bool:
+        # Done once every URL before the first reachable one has failed.
+        for index in range(len(urls)):
+            if index not in results:
+                return False
+            if results[index]:
+                return True
+        return True
+
+    deadline = time.monotonic() + overall_timeout
+    pool = ThreadPoolExecutor(max_workers=len(urls))
+    try:
+        futures = {pool.submit(_probe, url): index for index, url in enumerate(urls)}
+        pending = set(futures)
+        while pending and not _settled():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                debug(f"{len(pending)} ffmpeg mirror probe(s) timed out; keeping their order.")
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[futures[future]] = future.result()
+    finally:
+        # Do not wait for stalled probes; they end on their own socket timeout.
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    if not any(results.values()):
+        debug("No ffmpeg mirror answered the HEAD probe; trying all URLs in order.")
+        return list(urls)
+
+    ranked = [url for index, url in enumerate(urls) if results.get(index)]
+    return ranked + [url for index, url in enumerate(urls) if not results.get(index)]
+
+
 def _download_and_extract_archive(urls: List[str], archive_path: str, unpack_dir: str) -> None:
+    import http.client
+    import lzma
     import urllib.request
     from urllib.error import HTTPError, URLError
 
+    urls = _rank_download_urls(urls)
     attempted: List[str] = []
     last_error: Optional[Exception] = None
 
+    # tar archives can be decompressed straight off the socket, so no archive
+    # file is written and read back. Zip needs random access for its central
+    # directory (and for the parallel extraction), so it still goes via disk.
+    # Mirrors may mix formats, so decide per URL.
+    stream_tar = False
+
     for url in urls:
+        stream_tar = url.endswith((".tar.xz", ".tar"))
         attempted.append(url)
         debug(f"Attempting ffmpeg download from {url}")
+        request = urllib.request.Request(url, headers={"User-Agent": _DOWNLOAD_USER_AGENT})
         try:
-            urllib.request.urlretrieve(url, archive_path)
+            with urllib.request.urlopen(request, timeout=60) as response:
+                if stream_tar:
+                    os.makedirs(unpack_dir, exist_ok=True)
+                    debug(f"Streaming ffmpeg archive into {unpack_dir} ...")
+                    with tarfile.open(fileobj=response, mode="r|*") as tf:
+                        tf.extractall(unpack_dir)
+                else:
+                    # Stream in 1 MiB chunks rather than urlretrieve's 8 KiB blocks.
+                    with open(archive_path, "wb") as f:
+                        shutil.copyfileobj(response, f, length=1 << 20)
             last_error = None
             break
-        except (HTTPError, URLError, TimeoutError, OSError) as exc:
+        # A body cut short mid-read raises http.client.IncompleteRead, which
+        # is neither an OSError nor a URLError; a corrupt or truncated .tar.xz
+        # stream surfaces as LZMAError or EOFError from the decompressor.
+        except (
+            HTTPError,
+            URLError,
+            TimeoutError,
+            OSError,
+            http.client.HTTPException,
+            tarfile.TarError,
+            lzma.LZMAError,
+            EOFError,
+        ) as exc:
             last_error = exc
             _log_error(f"ffmpeg download failed from {url}: {exc}")
+            if stream_tar:
+                # Drop the partial tree before trying the next mirror.
+                shutil.rmtree(unpack_dir, ignore_errors=True)
 
     if last_error:
         raise RuntimeError(
@@ -429,54 +812,73 @@ def _download_and_extract_archive(urls: List[str], archive_path: str, unpack_dir
             "Install ffmpeg so it is on PATH or set YT_DIARIZER_FFMPEG_PATH."
         )
 
+    if stream_tar:
+        return
+
     os.makedirs(unpack_dir, exist_ok=True)
     debug(f"Extracting ffmpeg archive to {unpack_dir} ...")
     try:
-        if archive_path.endswith(".zip"):
-            with zipfile.ZipFile(archive_path, "r") as zf:
-                zf.extractall(unpack_dir)
-        elif archive_path.endswith((".tar.xz", ".tar")):
-            with tarfile.open(archive_path, "r:*") as tf:
-                tf.extractall(unpack_dir)
+        if attempted[-1].endswith(".zip"):
+            _extract_zip_parallel(archive_path, unpack_dir)
         else:
-            raise RuntimeError(f"Unsupported ffmpeg archive format: {archive_path}")
+            raise RuntimeError(f"Unsupported ffmpeg archive format: {attempted[-1]}")
     except Exception as exc:
         raise RuntimeError(
             f"Failed to extract ffmpeg archive '{archive_path}': {exc}"
         ) from exc
 
 
-def _find_ffmpeg_binaries(
-    root: Path, log: Callable[[str], None]
-) -> Tuple[Optional[Path], Optional[Path]]:
-    """Recursively search for ffmpeg/ffprobe binaries under root (case-insensitive)."""
+# Archive subtrees that never contain the ffmpeg/ffprobe executables.
+_BINARY_SEARCH_SKIP_DIRS = frozenset({"share", "doc", "docs", "presets", "include", "man", "__macosx"})
 
-    log(f"[yt-diarizer] Searching for ffmpeg/ffprobe under {root}")
 
-    ffmpeg_path: Optional[Path] = None
-    ffprobe_path: Optional[Path] = None
+def _find_binaries(
+    unpack_dir: Union[str, Path], names: Iterable[str]
+) -> Dict[str, Optional[Path]]:
+    """Breadth-first search for executables by (case-insensitive) file name.
+
+    Archives keep the binaries at the top level or in a shallow bin/, so a
+    BFS finds them after a few directory listings. The walk stops as soon as
+    every name is found and never descends into docs, headers or presets.
+    """
+    found: Dict[str, Optional[Path]] = {name.lower(): None for name in names}
+    missing = len(found)
+    queue = deque([os.fspath(unpack_dir)])
 
-    for path in root.rglob("*"):
-        if not path.is_file():
+    while queue and missing:
+        try:
+            entries = os.scandir(queue.popleft())
+        except OSError:
             continue
+        with entries:
+            for entry in entries:
+                name = entry.name.lower()
+                if entry.is_dir(follow_symlinks=False):
+                    if name not in _BINARY_SEARCH_SKIP_DIRS:
+                        queue.append(entry.path)
+                elif name in found and found[name] is None and entry.is_file():
+                    found[name] = Path(entry.path)
+                    missing -= 1
 
-        log(f"[yt-diarizer] Checking file: {path}")
+    return found
 
-        name = path.name.lower()
-        if name == "ffmpeg" and ffmpeg_path is None:
-            ffmpeg_path = path
-            log(f"[yt-diarizer] Found ffmpeg candidate: {path}")
-        elif name == "ffprobe" and ffprobe_path is None:
-            ffprobe_path = path
-            log(f"[yt-diarizer] Found ffprobe candidate: {path}")
 
-        if ffmpeg_path and ffprobe_path:
-            break
+def _find_ffmpeg_binaries(
+    root: Path, log: Callable[[str], None]
+) -> Tuple[Optional[Path], Optional[Path]]:
+    """Search for ffmpeg/ffprobe binaries under root (case-insensitive)."""
+
+    log(f"[yt-diarizer] Searching for ffmpeg/ffprobe under {root}")
+
+    found = _find_binaries(root, ("ffmpeg", "ffprobe"))
+    ffmpeg_path = found["ffmpeg"]
+    ffprobe_path = found["ffprobe"]
 
     log(
         "[yt-diarizer] ffmpeg search results: ffmpeg=%s, ffprobe=%s"
         % (ffmpeg_path, ffprobe_path)
     )
+
     if ffmpeg_path is None:
         raise RuntimeError(
             f"Could not locate 'ffmpeg' binary after scanning extracted archive under {root}"
@@ -485,9 +887,13 @@ def _find_ffmpeg_binaries(
     return ffmpeg_path, ffprobe_path
 
 
+_DYLIB_SEARCH_SKIP_DIRS = _BINARY_SEARCH_SKIP_DIRS | {"pkgconfig"}
+
+
 def _make_executable(path: Path) -> None:
-    mode = path.stat().st_mode
-    path.chmod(mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    # Only used on binaries we just wrote ourselves, so there is no existing
+    # mode worth preserving: set rwxr-xr-x directly and skip the stat call.
+    path.chmod(0o755)
 
 
 def _prepare_macos_ffmpeg(unpack_dir: Path, work_dir: Path, debug: bool = False) -> tuple[Path, Path]:
@@ -505,10 +911,11 @@ def _prepare_macos_ffmpeg(unpack_dir: Path, work_dir: Path, debug: bool = False)
     bin_dir.mkdir(parents=True, exist_ok=True)
     lib_dir.mkdir(parents=True, exist_ok=True)
 
-    ffmpeg_candidates = _find_binary(unpack_dir, "ffmpeg")
-    ffprobe_candidates = _find_binary(unpack_dir, "ffprobe")
+    found = _find_binaries(unpack_dir, ("ffmpeg", "ffprobe"))
+    ffmpeg_source = found["ffmpeg"]
+    ffprobe_source = found["ffprobe"]
 
-    if not ffmpeg_candidates or not ffprobe_candidates:
+    if ffmpeg_source is None or ffprobe_source is None:
         raise RuntimeError(
             "FFmpeg or ffprobe not found in the unpacked macOS archive. "
             "Please install FFmpeg manually and set FFMPEG_PATH and FFPROBE_PATH."
@@ -517,20 +924,25 @@ def _prepare_macos_ffmpeg(unpack_dir: Path, work_dir: Path, debug: bool = False)
     ffmpeg_path = bin_dir / "ffmpeg"
     ffprobe_path = bin_dir / "ffprobe"
 
-    shutil.copy2(ffmpeg_candidates[0], ffmpeg_path)
-    shutil.copy2(ffprobe_candidates[0], ffprobe_path)
+    shutil.copy2(ffmpeg_source, ffmpeg_path)
+    shutil.copy2(ffprobe_source, ffprobe_path)
 
     # Copy all shared libraries from the archive into our local lib directory.
     # The prebuilt ColorsWind binaries are linked against the build machine path
     # (/Users/runner/work/FFmpeg-macOS/FFmpeg-macOS/...), so we must keep the
     # .dylibs next to the binaries and rewrite their load paths.
-    for dylib in Path(unpack_dir).rglob("*.dylib"):
-        dest = lib_dir / dylib.name
-        if not dest.exists():
-            shutil.copy2(dylib, dest)
+    # Walk with pruning: headers, docs and pkgconfig data hold no dylibs.
+    for root, dirs, files in os.walk(unpack_dir):
+        dirs[:] = [d for d in dirs if d.lower() not in _DYLIB_SEARCH_SKIP_DIRS]
+        for name in files:
+            if not name.endswith(".dylib"):
+                continue
+            dest = lib_dir / name
+            if not dest.exists():
+                shutil.copy2(os.path.join(root, name), dest)
 
-    ffmpeg_path.chmod(ffmpeg_path.stat().st_mode | stat.S_IEXEC)
-    ffprobe_path.chmod(ffprobe_path.stat().st_mode | stat.S_IEXEC)
+    _make_executable(ffmpeg_path)
+    _make_executable(ffprobe_path)
 
     # Fix dyld load commands so that ffmpeg/ffprobe and the libs use the local
     # ffmpeg_macos/lib directory instead of the original build path.
@@ -590,6 +1002,7 @@ def _fix_macos_ffmpeg_install_names(ffmpeg_macos_dir: Path, debug: bool = False)
                 print(f"[yt-diarizer] otool -L failed for {binary}: {exc}")
             return
 
+        changes: List[str] = []
         lines = output.splitlines()[1:]
         for line in lines:
             if not line.strip():
@@ -610,23 +1023,21 @@ def _fix_macos_ffmpeg_install_names(ffmpeg_macos_dir: Path, debug: bool = False)
             if new_dep == dep:
                 continue
 
-            _run(["install_name_tool", "-change", dep, new_dep, str(binary)])
+            changes.extend(["-change", dep, new_dep])
 
-    # 1) Point ffmpeg and ffprobe to ../lib relative to their bin directory
-    for name in ("ffmpeg", "ffprobe"):
-        _patch_binary(bin_dir / name, use_executable_path=True)
+        # install_name_tool accepts any number of -change pairs, so rewrite all
+        # load commands of this binary with a single exec.
+        if changes:
+            _run(["install_name_tool", *changes, str(binary)])
 
+    # 1) Point ffmpeg and ffprobe to ../lib relative to their bin directory
     # 2) Ensure the .dylib files reference each other via @loader_path
-    for lib in libs.values():
-        _patch_binary(lib, use_executable_path=False)
-
-
-def _find_binary(unpack_dir: Union[str, Path], name: str) -> List[Path]:
-    matches: List[Path] = []
-    for root, _, files in os.walk(unpack_dir):
-        if name in files:
-            matches.append(Path(root) / name)
-    return matches
+    # Every binary is patched in place independently of the others, and the
+    # work is otool/install_name_tool process time, so run them concurrently.
+    jobs = [(bin_dir / name, True) for name in ("ffmpeg", "ffprobe")]
+    jobs.extend((lib, False) for lib in libs.values())
+    with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1)) as pool:
+        list(pool.map(lambda job: _patch_binary(*job), jobs))
 
 
 def download_ffmpeg_for_macos(work_dir: str) -> Dict[str, Optional[str]]:
@@ -688,24 +1099,146 @@ def download_ffmpeg_for_other_platforms(work_dir: str) -> Dict[str, str]:
 
     ffmpeg_name = "ffmpeg.exe" if os.name == "nt" else "ffmpeg"
     ffprobe_name = "ffprobe.exe" if os.name == "nt" else "ffprobe"
-    ffmpeg_candidates = _find_binary(unpack_dir, ffmpeg_name)
-    ffprobe_candidates = _find_binary(unpack_dir, ffprobe_name)
+    found = _find_binaries(unpack_dir, (ffmpeg_name, ffprobe_name))
+    ffmpeg_path = found[ffmpeg_name]
+    ffprobe_path = found[ffprobe_name]
 
-    if not ffmpeg_candidates or not ffprobe_candidates:
+    if ffmpeg_path is None or ffprobe_path is None:
         raise RuntimeError("Downloaded ffmpeg archive missing ffmpeg/ffprobe binary")
 
-    ffmpeg_path = ffmpeg_candidates[0]
-    ffprobe_path = ffprobe_candidates[0]
-
+    # Freshly extracted by us, so chmod cannot fail for lack of ownership.
     for binary_path in (ffmpeg_path, ffprobe_path):
-        try:
-            os.chmod(binary_path, 0o755)
-        except Exception:
-            pass
+        os.chmod(binary_path, 0o755)
 
     return {"ffmpeg": str(ffmpeg_path), "ffprobe": str(ffprobe_path)}
 
 
+def _user_cache_dir() -> str:
+    """Persistent per-user cache root that survives workspace cleanup.
+
+    Follows XDG_CACHE_HOME when it is set, like pip, uv and Hugging Face do.
+    """
+
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join("~", ".cache")
+    return os.path.join(os.path.expanduser(base), "yt_diarizer")
+
+
+def _ffmpeg_manifest_path() -> str:
+    return os.path.join(_user_cache_dir(), "ffmpeg.json")
+
+
+def _ffmpeg_cache_key() -> str:
+    return f"{sys.platform}-{platform.machine().lower()}"
+
+
+def _load_ffmpeg_manifest() -> Optional[Dict[str, str]]:
+    """Return cached ffmpeg/ffprobe paths from a previous download, if still valid."""
+
+    if os.environ.get("YT_DIARIZER_IGNORE_FFMPEG_CACHE"):
+        return None
+
+    try:
+        with open(_ffmpeg_manifest_path(), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        entry = manifest[_ffmpeg_cache_key()]
+        ffmpeg_path = entry["ffmpeg"]
+        ffprobe_path = entry["ffprobe"]
+        if not (os.path.isfile(ffmpeg_path) and os.path.isfile(ffprobe_path)):
+            return None
+        if os.path.getmtime(ffmpeg_path) != entry["mtime"]:
+            return None
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+    return {"ffmpeg": ffmpeg_path, "ffprobe": ffprobe_path}
+
+
+def _persist_downloaded_ffmpeg(download_paths: Dict[str, Optional[str]]) -> Dict[str, str]:
+    """Copy freshly downloaded binaries out of the workspace and record them.
+
+    On macOS the whole prepared ffmpeg_macos tree is copied so the rewritten
+    @executable_path/@loader_path references keep resolving. Failures are
+    logged and the workspace copies are returned unchanged.
+    """
+
+    ffmpeg_path = str(download_paths["ffmpeg"])
+    ffprobe_path = str(download_paths["ffprobe"])
+    cache_root = os.path.join(_user_cache_dir(), "ffmpeg", _ffmpeg_cache_key())
+
+    try:
+        if sys.platform == "darwin":
+            prepared_root = os.path.dirname(os.path.dirname(ffmpeg_path))
+            shutil.copytree(prepared_root, cache_root, dirs_exist_ok=True)
+            cached_bin = os.path.join(cache_root, "bin")
+        else:
+            cached_bin = os.path.join(cache_root, "bin")
+            os.makedirs(cached_bin, exist_ok=True)
+            for binary_path in (ffmpeg_path, ffprobe_path):
+                shutil.copy2(binary_path, cached_bin)
+
+        cached_ffmpeg = os.path.join(cached_bin, os.path.basename(ffmpeg_path))
+        cached_ffprobe = os.path.join(cached_bin, os.path.basename(ffprobe_path))
+
+        manifest_path = _ffmpeg_manifest_path()
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            if not isinstance(manifest, dict):
+                manifest = {}
+        except (OSError, ValueError):
+            manifest = {}
+
+        manifest[_ffmpeg_cache_key()] = {
+            "ffmpeg": cached_ffmpeg,
+            "ffprobe": cached_ffprobe,
+            "mtime": os.path.getmtime(cached_ffmpeg),
+            "platform": sys.platform,
+        }
+        with open(manifest_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+    except OSError as exc:
+        debug(f"Could not cache downloaded ffmpeg for later runs: {exc}")
+        return {"ffmpeg": ffmpeg_path, "ffprobe": ffprobe_path}
+
+    debug(f"Cached downloaded ffmpeg for later runs in {cached_bin}")
+    return {"ffmpeg": cached_ffmpeg, "ffprobe": cached_ffprobe}
+
+
+def _workspace_ffmpeg_sentinel(work_dir: str) -> str:
+    return os.path.join(work_dir, ".ffmpeg-prepared.json")
+
+
+def _mark_workspace_ffmpeg(work_dir: str, paths: Dict[str, Optional[str]]) -> None:
+    """Record fully prepared (extracted and, on macOS, patched) binaries in work_dir."""
+    try:
+        with open(_workspace_ffmpeg_sentinel(work_dir), "w", encoding="utf-8") as f:
+            json.dump({"ffmpeg": paths["ffmpeg"], "ffprobe": paths.get("ffprobe")}, f)
+    except OSError as exc:
+        debug(f"Could not write workspace ffmpeg sentinel: {exc}")
+
+
+def _load_workspace_ffmpeg(work_dir: str) -> Optional[Dict[str, str]]:
+    """Return binaries an earlier ensure_ffmpeg call prepared in this workspace.
+
+    The sentinel is only written after extraction and install-name patching
+    succeed, so a half-prepared tree is never picked up.
+    """
+    try:
+        with open(_workspace_ffmpeg_sentinel(work_dir), "r", encoding="utf-8") as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(entry, dict):
+        return None
+    ffmpeg_path = entry.get("ffmpeg")
+    ffprobe_path = entry.get("ffprobe")
+    for path in (ffmpeg_path, ffprobe_path):
+        if not isinstance(path, str) or not os.access(path, os.X_OK):
+            return None
+    return {"ffmpeg": ffmpeg_path, "ffprobe": ffprobe_path}
+
+
 def ensure_ffmpeg(work_dir: str) -> Dict[str, Optional[str]]:
     """
     Ensure ffmpeg and ffprobe are available.
@@ -713,8 +1246,10 @@ def ensure_ffmpeg(work_dir: str) -> Dict[str, Optional[str]]:
     Priority order:
     1. Environment overrides (YT_DIARIZER_FFMPEG_PATH / YT_DIARIZER_FFPROBE_PATH).
     2. Binaries already on PATH.
-    3. macOS: download from the previously working ColorsWind release.
-    4. Other platforms: download from yt-dlp/FFmpeg-Builds.
+    3. Binaries downloaded by a previous run (~/.cache/yt_diarizer/ffmpeg.json).
+    4. Binaries already prepared in this workspace (work_dir/.ffmpeg-prepared.json).
+    5. macOS: download from the previously working ColorsWind release.
+    6. Other platforms: download from yt-dlp/FFmpeg-Builds.
     """
 
     env_paths = _ffmpeg_from_env()
@@ -739,6 +1274,28 @@ def ensure_ffmpeg(work_dir: str) -> Dict[str, Optional[str]]:
             "location_dir": bin_dir,
         }
 
+    cached_paths = _load_ffmpeg_manifest()
+    if cached_paths:
+        bin_dir = os.path.dirname(cached_paths["ffmpeg"])
+        os.environ["PATH"] = bin_dir + os.pathsep + os.environ.get("PATH", "")
+        debug(f"Using ffmpeg cached by a previous run: {cached_paths['ffmpeg']}")
+        return {
+            "ffmpeg": cached_paths["ffmpeg"],
+            "ffprobe": cached_paths["ffprobe"],
+            "location_dir": bin_dir,
+        }
+
+    prepared_paths = _load_workspace_ffmpeg(work_dir)
+    if prepared_paths:
+        bin_dir = os.path.dirname(prepared_paths["ffmpeg"])
+        os.environ["PATH"] = bin_dir + os.pathsep + os.environ.get("PATH", "")
+        debug(f"Using ffmpeg already prepared in this workspace: {prepared_paths['ffmpeg']}")
+        return {
+            "ffmpeg": prepared_paths["ffmpeg"],
+            "ffprobe": prepared_paths["ffprobe"],
+            "location_dir": bin_dir,
+        }
+
     if sys.platform == "darwin":
         try:
             download_paths = download_ffmpeg_for_macos(work_dir)
@@ -756,6 +1313,9 @@ def ensure_ffmpeg(work_dir: str) -> Dict[str, Optional[str]]:
                 "YT_DIARIZER_FFMPEG_PATH/FFPROBE_PATH."
             ) from exc
 
+    _mark_workspace_ffmpeg(work_dir, download_paths)
+    download_paths = _persist_downloaded_ffmpeg(download_paths)
+
     bin_dir = os.path.dirname(download_paths["ffmpeg"])
     os.environ["PATH"] = bin_dir + os.pathsep + os.environ.get("PATH", "")
     debug(
@@ -769,6 +1329,47 @@ def ensure_ffmpeg(work_dir: str) -> Dict[str, Optional[str]]:
     }
 
 
+# Hugging Face repos WhisperX pulls on first use with the default settings:
+# the faster-whisper large-v3 weights and the pyannote diarization pipeline.
+_PREFETCH_MODELS = [
+    (
+        "Systran/faster-whisper-large-v3",
+        ["config.json", "preprocessor_config.json", "model.bin", "tokenizer.json", "vocabulary.*"],
+    ),
+    ("pyannote/speaker-diarization-3.1", None),
+    ("pyannote/segmentation-3.0", None),
+]
+
+# Upper bound on how long transcription waits for the background prefetch. A
+# stalled Hugging Face connection must not hang the run; whatever is still
+# missing afterwards is downloaded by WhisperX itself.
+_PREFETCH_WAIT_SECONDS = 600
+
+
+def _prefetch_whisperx_models(hf_token: str) -> None:
+    """Warm the Hugging Face cache with the models WhisperX is about to load.
+
+    Best effort: anything that fails here is simply downloaded by WhisperX
+    itself later. Cached files are not downloaded again.
+    """
+    try:
+        from huggingface_hub import snapshot_download
+    except ImportError:
+        return
+
+    for repo_id, allow_patterns in _PREFETCH_MODELS:
+        try:
+            snapshot_download(repo_id, token=hf_token, allow_patterns=allow_patterns)
+        except Exception as exc:  # best-effort only
+            debug(f"Model prefetch for {repo_id} skipped: {exc}")
+
+
+# Whisper and pyannote both decode input to 16 kHz mono s16 via ffmpeg. Having
+# yt-dlp write that format directly folds the conversion into its single
+# demux pass, so the later loads only read PCM instead of re-decoding.
+WHISPER_AUDIO_ARGS = ["-ac", "1", "-ar", "16000", "-sample_fmt", "s16"]
+
+
 def run_pipeline_inside_venv(script_dir: str, work_dir: str) -> None:
     """Inner stage: actual diarization pipeline inside the venv."""
     if not work_dir:
@@ -779,27 +1380,69 @@ def run_pipeline_inside_venv(script_dir: str, work_dir: str) -> None:
     mps_convert = os.environ.get(ENV_MPS_CONVERT_VAR) == "1"
 
     _configure_cache_dirs(work_dir)
+    _configure_cpu_threads()
 
     ffmpeg_paths = ensure_ffmpeg(work_dir)
     ffmpeg_location = ffmpeg_paths["location_dir"]
 
-    url = _resolve_youtube_url()
+    hf_token = ""
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        probe_future = None
+        if not mps_convert:
+            hf_token = load_hf_token(script_dir)
+            os.environ.setdefault("HF_TOKEN", hf_token)
+            if not os.environ.get("YT_DIARIZER_SKIP_HF_PROBE"):
+                # The probe is a network round trip; overlap it with the URL prompt.
+                probe_future = pool.submit(_probe_hf_model, hf_token)
+
+        url = _resolve_youtube_url()
+        if probe_future is not None:
+            probe_future.result()
+
     if mps_convert:
         _run_mps_transcription(script_dir, work_dir, url, ffmpeg_location)
         return
 
-    hf_token = load_hf_token(script_dir)
-    os.environ.setdefault("HF_TOKEN", hf_token)
-
+    _configure_inference_device()
     deps = ensure_dependencies()
     yt_downloader = deps["yt_downloader"]
     whisperx_bin = deps["whisperx"]
 
+    # Model weights and the audio are independent network transfers; fetch the
+    # weights in the background while yt-dlp downloads. Daemon thread so that
+    # Ctrl-C is not held up by a multi-GB download.
+    prefetch: Optional[threading.Thread] = None
+    if not os.environ.get("YT_DIARIZER_NO_PREFETCH"):
+        prefetch = threading.Thread(
+            target=_prefetch_whisperx_models, args=(hf_token,), daemon=True
+        )
+        prefetch.start()
+
     audio_path = download_best_audio(
-        yt_downloader, url, work_dir, script_dir, ffmpeg_location
+        yt_downloader, url, work_dir, script_dir, ffmpeg_location, WHISPER_AUDIO_ARGS
     )
+
+    def _wait_for_prefetch() -> None:
+        # Only called when WhisperX actually runs; a transcript cache hit
+        # needs no models, so it does not wait for the downloads.
+        if prefetch is None:
+            return
+        prefetch.join(timeout=_PREFETCH_WAIT_SECONDS)
+        if prefetch.is_alive():
+            debug("Model prefetch is still running; letting WhisperX download the rest.")
+
+    # Identical audio and settings reuse an earlier transcript; the ephemeral
+    # cache mode promises to leave nothing behind, so it skips this cache.
+    transcript_cache: Optional[str] = None
+    if not os.environ.get("YT_DIARIZER_EPHEMERAL_CACHE"):
+        transcript_cache = os.path.join(_user_cache_dir(), "transcripts")
     json_result_path = run_whisperx_cli(
-        whisperx_bin, audio_path, hf_token, work_dir
+        whisperx_bin,
+        audio_path,
+        hf_token,
+        work_dir,
+        cache_dir=transcript_cache,
+        before_run=_wait_for_prefetch,
     )
 
     transcript_lines = build_diarized_transcript_from_json(json_result_path)
@@ -820,7 +1463,7 @@ def _run_mps_transcription(
 
     yt_downloader = find_executable(["yt-dlp", "yt_dlp"])
     audio_path = download_best_audio(
-        yt_downloader, url, work_dir, script_dir, ffmpeg_location
+        yt_downloader, url, work_dir, script_dir, ffmpeg_location, WHISPER_AUDIO_ARGS
     )
     json_result_path, transcript_lines = transcribe_audio_with_mps_whisper(
         audio_path, work_dir
@@ -834,27 +1477,61 @@ def _run_mps_transcription(
     log_line(f"Raw Whisper output (JSON): {outputs['json']}")
 
 
-def setup_and_run_in_venv(
-    script_dir: str, work_dir: str, entrypoint_path: str, mps_convert: bool = False
-) -> int:
-    """
-    Outer stage: create temporary venv in work_dir, install deps, then re-run this
-    script inside that venv. Finally, return the exit code from the inner run.
+def _start_import_prewarm(
+    venv_python: str, env: Dict[str, str], mps_convert: bool
+) -> Optional[subprocess.Popen]:
+    """Import the heavy transcription stack in the background to warm the page cache.
+
+    The inner stage spends its first seconds to minutes resolving ffmpeg,
+    prompting for the URL and downloading audio before it starts Whisper.
+    Importing torch and friends concurrently pulls their .so/.pyc files into
+    the OS page cache, so the transcription step starts faster. Disable with
+    YT_DIARIZER_NO_PREWARM=1.
     """
-    ensure_pkg_config_available()
+    if os.environ.get("YT_DIARIZER_NO_PREWARM"):
+        return None
+
+    modules = "torch, whisper, yt_dlp" if mps_convert else "torch, whisperx, yt_dlp"
+    try:
+        return subprocess.Popen(
+            [venv_python, "-c", f"import {modules}"],
+            env=env,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+    except OSError as exc:
+        debug(f"Skipping import pre-warm: {exc}")
+        return None
 
-    debug(f"Creating temporary virtualenv in {work_dir} ...")
 
-    venv_dir = os.path.join(work_dir, "venv")
-    rc, lines = run_logged_subprocess(
-        [sys.executable, "-m", "venv", venv_dir],
-        "create virtualenv",
+def _venv_fingerprint(mps_convert: bool, torch_index: str = TORCH_CPU_INDEX) -> str:
+    """Hash everything that determines the contents of a provisioned venv."""
+
+    payload = json.dumps(
+        {
+            "pins": PINNED_VERSIONS,
+            "torch_index": torch_index,
+            "python": list(sys.version_info[:3]),
+            "executable": os.path.realpath(sys.executable),
+            "platform": sys.platform,
+            "stack": "mps" if mps_convert else "whisperx",
+        },
+        sort_keys=True,
     )
-    if rc != 0:
-        snippet = "\n".join([ln for ln in lines if ln][-50:])
-        raise PipelineError(
-            f"Failed to create virtualenv: exit code {rc}.\nLast output snippet:\n{snippet}"
-        )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def _venv_layout(
+    work_dir: str, mps_convert: bool, torch_index: str = TORCH_CPU_INDEX
+) -> Dict[str, str]:
+    """Return the venv directory, bin dir, python and sentinel paths for this stack."""
+
+    fingerprint = _venv_fingerprint(mps_convert, torch_index)
+    if os.environ.get("YT_DIARIZER_EPHEMERAL_VENV"):
+        venv_dir = os.path.join(work_dir, "venv")
+    else:
+        venv_dir = os.path.join(_user_cache_dir(), "venvs", fingerprint)
 
     if os.name == "nt":
         venv_bin = os.path.join(venv_dir, "Scripts")
@@ -863,16 +1540,150 @@ def setup_and_run_in_venv(
         venv_bin = os.path.join(venv_dir, "bin")
         venv_python = os.path.join(venv_bin, "python")
 
+    return {
+        "dir": venv_dir,
+        "bin": venv_bin,
+        "python": venv_python,
+        "sentinel": os.path.join(venv_dir, f".provisioned-{fingerprint}"),
+    }
+
+
+def _venv_is_provisioned(layout: Dict[str, str]) -> bool:
+    return (
+        not os.environ.get("YT_DIARIZER_EPHEMERAL_VENV")
+        and os.path.isfile(layout["sentinel"])
+        and os.path.isfile(layout["python"])
+    )
+
+
+def _provision_venv(
+    work_dir: str, mps_convert: bool, torch_index: str = TORCH_CPU_INDEX
+) -> Tuple[str, str]:
+    """
+    Return (venv_bin, venv_python) for a venv with all dependencies installed.
+
+    Provisioned venvs are kept under ~/.cache/yt_diarizer/venvs/<fingerprint>
+    and marked with a sentinel file once pip succeeds, so later runs with the
+    same pins and interpreter skip both venv creation and pip. Set
+    YT_DIARIZER_EPHEMERAL_VENV=1 to build a throwaway venv inside work_dir.
+    """
+    layout = _venv_layout(work_dir, mps_convert, torch_index)
+    ephemeral = bool(os.environ.get("YT_DIARIZER_EPHEMERAL_VENV"))
+    venv_dir = layout["dir"]
+    venv_bin = layout["bin"]
+    venv_python = layout["python"]
+    sentinel = layout["sentinel"]
+
+    if _venv_is_provisioned(layout):
+        debug(f"Reusing provisioned virtualenv in {venv_dir}")
+        return venv_bin, venv_python
+
+    if os.path.isdir(venv_dir):
+        # Left over from an interrupted or failed install; start clean.
+        shutil.rmtree(venv_dir, ignore_errors=True)
+
+    debug(f"Creating virtualenv in {venv_dir} ...")
+    # Build the venv in-process instead of spawning `python -m venv`. Only
+    # ensurepip still runs as a child; the bundled pip is enough to bootstrap
+    # uv, so it is not upgraded.
+    try:
+        venv.EnvBuilder(
+            symlinks=os.name != "nt", with_pip=True, upgrade_deps=False
+        ).create(venv_dir)
+    except (OSError, subprocess.CalledProcessError) as exc:
+        output = getattr(exc, "output", None)
+        snippet = output.decode("utf-8", "replace")[-2000:] if isinstance(output, bytes) else ""
+        raise PipelineError(
+            f"Failed to create virtualenv: {exc}.\nLast output snippet:\n{snippet}"
+        ) from exc
+
     if not os.path.isfile(venv_python):
         raise PipelineError(f"Could not locate venv python at {venv_python}")
 
-    install_python_dependencies(venv_python, mps_convert=mps_convert)
+    install_python_dependencies(venv_python, mps_convert=mps_convert, torch_index=torch_index)
 
-    env = os.environ.copy()
-    env[ENV_STAGE_VAR] = "inner"
-    env[ENV_WORKDIR_VAR] = work_dir
-    env["PATH"] = venv_bin + os.pathsep + env.get("PATH", "")
+    if not ephemeral:
+        with open(sentinel, "w", encoding="utf-8"):
+            pass
+
+    return venv_bin, venv_python
+
+
+def _has_required_modules(mps_convert: bool) -> bool:
+    """Return True when the current interpreter already provides the transcription stack.
+
+    Only module specs and console scripts are looked up; nothing heavy is
+    imported, so the check is cheap when the stack is missing.
+    """
+    modules = ("torch", "whisper", "yt_dlp") if mps_convert else ("torch", "whisperx", "yt_dlp")
+    if any(importlib.util.find_spec(name) is None for name in modules):
+        return False
+
+    executables = ["yt-dlp", "yt_dlp"] if mps_convert else ["yt-dlp", "yt_dlp", "whisperx"]
+    resolved = which_many(executables)
+    has_downloader = bool(resolved["yt-dlp"] or resolved["yt_dlp"])
+    return has_downloader and (mps_convert or bool(resolved["whisperx"]))
+
+
+def setup_and_run_in_venv(
+    script_dir: str, work_dir: str, entrypoint_path: str, mps_convert: bool = False
+) -> int:
+    """
+    Outer stage: provision (or reuse) a venv with all deps, then re-run this
+    script inside that venv. Finally, return the exit code from the inner run.
+
+    When ``YT_DIARIZER_SKIP_VENV=1`` is set or the running interpreter already
+    has the dependencies (e.g. a prebuilt container image), the pipeline runs
+    in-process instead.
+    """
+    if os.environ.get("YT_DIARIZER_SKIP_VENV") == "1" or _has_required_modules(mps_convert):
+        debug("Dependencies already available; running pipeline without a venv.")
+        os.environ[ENV_STAGE_VAR] = "inner"
+        os.environ[ENV_WORKDIR_VAR] = work_dir
+        run_pipeline_inside_venv(script_dir, work_dir)
+        return 0
+
+    torch_index = TORCH_CPU_INDEX if mps_convert else _select_torch_index()
+
+    # pkg-config only matters while wheels are being installed; a provisioned
+    # venv has nothing left to build.
+    if not _venv_is_provisioned(_venv_layout(work_dir, mps_convert, torch_index)):
+        ensure_pkg_config_available()
+
+    # ffmpeg resolution is network-bound and shares nothing with the venv
+    # build, so run it in the background while the venv is created and
+    # dependencies are installed.
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        ffmpeg_future = pool.submit(ensure_ffmpeg, work_dir)
+
+        venv_bin, venv_python = _provision_venv(work_dir, mps_convert, torch_index)
+
+        try:
+            ffmpeg_paths: Optional[Dict[str, Optional[str]]] = ffmpeg_future.result()
+        except (DependencyError, RuntimeError) as exc:
+            # Leave it to the inner stage to retry and report the failure.
+            debug(f"Background ffmpeg setup failed: {exc}")
+            ffmpeg_paths = None
+
+    # Only the inner-stage keys differ from our own environment. The rest is
+    # inherited as-is (proxies, HF_* and CUDA settings, cookies paths), so no
+    # allowlist is applied.
+    overlay = {
+        ENV_STAGE_VAR: "inner",
+        ENV_WORKDIR_VAR: work_dir,
+        "PATH": venv_bin + os.pathsep + os.environ.get("PATH", ""),
+    }
+    if ffmpeg_paths and ffmpeg_paths.get("location_dir"):
+        overlay[ENV_FFMPEG_DIR_VAR] = str(ffmpeg_paths["location_dir"])
+    env = {**os.environ, **overlay}
+
+    prewarm = _start_import_prewarm(venv_python, env, mps_convert)
 
     debug("Re-running script inside venv...")
-    completed = subprocess.run([venv_python, os.path.abspath(entrypoint_path)], env=env)
+    try:
+        completed = subprocess.run([venv_python, os.path.abspath(entrypoint_path)], env=env)
+    finally:
+        if prewarm is not None and prewarm.poll() is None:
+            prewarm.kill()
+            prewarm.wait()
     return completed.returncode
@@ -1,21 +1,39 @@
 """Subprocess helpers with logging."""
 
+import os
+import selectors
 import subprocess
 import sys
-from typing import List, Optional, Tuple
+from collections import deque
+from typing import Deque, List, Optional, Tuple
 
 from .logging_utils import debug, log_line
 
+_READ_CHUNK_SIZE = 64 * 1024
+# How long a child may stay silent before a "still running" line is logged.
+_KEEPALIVE_SECONDS = 30.0
+
+
+def _decode_line(raw: bytes) -> str:
+    if raw.isascii():
+        return raw.decode("ascii")
+    return raw.decode("utf-8", errors="replace")
+
 
 def run_logged_subprocess(
     cmd: List[str],
     description: str,
     cwd: Optional[str] = None,
     env: Optional[dict] = None,
+    tail: Optional[int] = None,
 ) -> Tuple[int, List[str]]:
     """
     Run a subprocess, streaming combined stdout/stderr to console and log file.
 
+    With ``tail`` set, only the last ``tail`` non-empty lines are kept, so
+    verbose children (WhisperX, yt-dlp) do not accumulate their whole output
+    just for an error snippet.
+
     Returns:
       (returncode, list_of_output_lines)
     """
@@ -26,41 +44,74 @@ def run_logged_subprocess(
         env=env,
         stdout=subprocess.PIPE,
         stderr=subprocess.STDOUT,
-        bufsize=0,
+        bufsize=_READ_CHUNK_SIZE,
     )
 
-    lines: List[str] = []
-    buffer = ""
+    lines: Deque[str] = deque(maxlen=tail)
+    # Lines are assembled as bytes and decoded only once complete; a full line
+    # never ends inside a multi-byte UTF-8 sequence, so no decoder state has
+    # to be carried between reads.
+    buffer = bytearray()
     assert process.stdout is not None
 
+    def _emit(raw: bytes) -> None:
+        # Progress bars redraw themselves with bare "\r"; only the last frame of
+        # a line is what the terminal ends up showing, so only that is decoded.
+        raw = raw.rstrip(b"\r").rpartition(b"\r")[2]
+        clean_line = _decode_line(raw)
+        if clean_line:
+            log_line(clean_line)
+        elif tail is not None:
+            return
+        lines.append(clean_line)
+
+    # Pipes cannot be polled with selectors on Windows; there the loop simply
+    # blocks in read1 as before, without keepalive messages.
+    selector: Optional[selectors.BaseSelector] = None
+    if os.name != "nt":
+        selector = selectors.DefaultSelector()
+        selector.register(process.stdout, selectors.EVENT_READ)
+    silent_for = 0.0
+
     # Stream raw output to the console to preserve ANSI colors and progress
     # animations, while accumulating full lines for logging and error handling.
     while True:
-        chunk = process.stdout.read(1024)
+        if selector is not None and not selector.select(timeout=_KEEPALIVE_SECONDS):
+            silent_for += _KEEPALIVE_SECONDS
+            debug(f"Still running ({description}); no output for {silent_for:.0f}s")
+            continue
+        silent_for = 0.0
+
+        # read1 returns whatever is already buffered (up to the limit) without
+        # waiting for a full chunk, so progress animations still flush promptly.
+        chunk = process.stdout.read1(_READ_CHUNK_SIZE)
         if not chunk:
             break
 
         sys.stdout.buffer.write(chunk)
         sys.stdout.buffer.flush()
 
-        try:
-            text_chunk = chunk.decode("utf-8", errors="replace")
-        except AttributeError:
-            # If chunk is already a string (unlikely), keep it as is.
-            text_chunk = chunk
+        buffer += chunk
+        start = 0
+        while True:
+            newline = buffer.find(b"\n", start)
+            if newline < 0:
+                break
+            _emit(bytes(buffer[start:newline]))
+            start = newline + 1
+        # Drop all consumed lines at once rather than shifting the buffer per line.
+        del buffer[:start]
+        # A progress bar can run for minutes without a newline; keep only its
+        # latest frame. A trailing "\r" may be the first half of "\r\n".
+        carriage = buffer.rfind(b"\r", 0, len(buffer) - 1)
+        if carriage > 0:
+            del buffer[:carriage]
 
-        buffer += text_chunk
-        while "\n" in buffer:
-            line, buffer = buffer.split("\n", 1)
-            clean_line = line.rstrip("\r")
-            if clean_line:
-                log_line(clean_line)
-            lines.append(clean_line)
+    if selector is not None:
+        selector.close()
 
     if buffer.strip():
-        clean_line = buffer.rstrip("\r")
-        log_line(clean_line)
-        lines.append(clean_line)
+        _emit(bytes(buffer))
 
     process.wait()
-    return process.returncode, lines
+    return process.returncode, list(lines)
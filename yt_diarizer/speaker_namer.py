@@ -1,13 +1,14 @@
 """Interactive helper to rename diarized speakers in transcript outputs."""
 
 import argparse
-import json
+import heapq
 import math
 import os
 import re
 import unicodedata
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
+from .json_utils import dump_json, load_json
 from .transcriber import format_timestamp
 
 CYRILLIC_TO_LATIN = {
@@ -46,44 +47,97 @@ CYRILLIC_TO_LATIN = {
     "я": "ya",
 }
 
+# Both cases map to the (lowercase) Latin spelling; the result is upper-cased
+# afterwards. str.translate accepts multi-character replacements.
+_TRANSLIT_TABLE = str.maketrans(
+    {
+        **{ord(k): v for k, v in CYRILLIC_TO_LATIN.items()},
+        **{ord(k.upper()): v for k, v in CYRILLIC_TO_LATIN.items()},
+    }
+)
 
-SPEAKER_RE = re.compile(r"\b(SPEAKER_\d{2})\b")
+
+# Tags are always ASCII, so skip Unicode-aware \b/\d matching.
+SPEAKER_RE = re.compile(r"\b(SPEAKER_\d{2})\b", re.ASCII)
+
+# transliterate_to_english: punctuation becomes spaces, then runs of spaces
+# and hyphens collapse to a single underscore.
+_SANITIZE_RE = re.compile(r"[^\w\s-]")
+_COLLAPSE_RE = re.compile(r"[-\s]+")
 
 PREVIEW_LIMIT = 20
 
+# Large write buffer for the NAMED_ outputs: far fewer write() calls than the
+# default 8 KiB buffer on multi-megabyte transcripts.
+_WRITE_BUFFER_SIZE = 256 * 1024
+
+_SEGMENT_SCORE_KEYS = frozenset(
+    (
+        "speaker_prob",
+        "speaker_probs",
+        "score",
+        "confidence",
+        "avg_logprob",
+        "no_speech_prob",
+    )
+)
+
+
+# The combining-mark blocks (diacritical marks plus their extended,
+# supplement, symbol and half-mark ranges) cover the accents found in Latin and
+# Cyrillic names; rarer marks are handled by the slower fallback below.
+_COMBINING_DELETE = dict.fromkeys(
+    [
+        *range(0x0300, 0x0370),
+        *range(0x1AB0, 0x1B00),
+        *range(0x1DC0, 0x1E00),
+        *range(0x20D0, 0x2100),
+        *range(0xFE20, 0xFE30),
+    ]
+)
+
 
 def _strip_diacritics(text: str) -> str:
-    normalized = unicodedata.normalize("NFKD", text)
-    return "".join(ch for ch in normalized if not unicodedata.combining(ch))
+    if text.isascii():
+        return text
+    stripped = unicodedata.normalize("NFKD", text).translate(_COMBINING_DELETE)
+    if stripped.isascii():
+        return stripped
+    return "".join(ch for ch in stripped if not unicodedata.combining(ch))
 
 
 def transliterate_to_english(name: str) -> str:
     """Transliterate a provided name to ASCII-friendly uppercase with underscores."""
-    transliterated: List[str] = []
-    for char in name:
-        lower = char.lower()
-        if lower in CYRILLIC_TO_LATIN:
-            transliterated.append(CYRILLIC_TO_LATIN[lower])
-        else:
-            transliterated.append(char)
-    ascii_like = _strip_diacritics("".join(transliterated))
-    sanitized = re.sub(r"[^\w\s-]", " ", ascii_like)
-    collapsed = re.sub(r"[-\s]+", "_", sanitized).strip("_")
+    if name.isascii():
+        ascii_like = name
+    else:
+        ascii_like = _strip_diacritics(name.translate(_TRANSLIT_TABLE))
+    sanitized = _SANITIZE_RE.sub(" ", ascii_like)
+    collapsed = _COLLAPSE_RE.sub("_", sanitized).strip("_")
     return collapsed.upper()
 
 
-def collect_speaker_lines(lines: List[str]) -> Tuple[Dict[str, List[str]], List[str]]:
+def collect_speaker_lines(lines: Iterable[str]) -> Tuple[Dict[str, List[str]], List[str]]:
+    # speaker_lines doubles as the ordered set of speakers: dicts keep
+    # insertion order, so its keys are the speakers in order of appearance.
     speaker_lines: Dict[str, List[str]] = {}
-    ordered: List[str] = []
     for line in lines:
+        if "SPEAKER_" not in line:
+            continue
         for match in SPEAKER_RE.findall(line):
             speaker_lines.setdefault(match, []).append(line)
-            if match not in ordered:
-                ordered.append(match)
-    return speaker_lines, ordered
+    return speaker_lines, list(speaker_lines)
 
 
 def _safe_float(value: Any) -> Optional[float]:
+    # Parsed JSON mostly yields floats, ints or None; skip float()/try for them.
+    value_type = type(value)
+    if value_type is float:
+        return value
+    if value_type is int:
+        return float(value)
+    if value is None:
+        return None
     try:
         return float(value)
     except (TypeError, ValueError):
@@ -113,22 +167,29 @@ def extract_speaker_score(segment: Dict[str, Any], speaker: str) -> float:
     If nothing usable is found, return 0.0 to keep sorting deterministic.
     """
 
-    # 1) Explicit segment-level probabilities for this speaker
-    prob = _safe_float(segment.get("speaker_prob"))
-    if prob is not None:
-        return prob
+    # Most segments carry only one or two of the score keys; find them with a
+    # single set intersection instead of probing the segment for each one.
+    present = _SEGMENT_SCORE_KEYS.intersection(segment)
 
-    speaker_probs = segment.get("speaker_probs")
-    if isinstance(speaker_probs, dict):
-        prob = _safe_float(speaker_probs.get(speaker))
+    # 1) Explicit segment-level probabilities for this speaker
+    if "speaker_prob" in present:
+        prob = _safe_float(segment["speaker_prob"])
         if prob is not None:
             return prob
 
+    if "speaker_probs" in present:
+        speaker_probs = segment["speaker_probs"]
+        if isinstance(speaker_probs, dict):
+            prob = _safe_float(speaker_probs.get(speaker))
+            if prob is not None:
+                return prob
+
     # 1b) Generic segment-level confidence/score
     for key in ("score", "confidence"):
-        prob = _safe_float(segment.get(key))
-        if prob is not None:
-            return prob
+        if key in present:
+            prob = _safe_float(segment[key])
+            if prob is not None:
+                return prob
 
     # 2) Word-level scores (more common in whisperx / faster-whisper outputs)
     words = segment.get("words")
@@ -164,7 +225,9 @@ def extract_speaker_score(segment: Dict[str, Any], speaker: str) -> float:
             return sum(scores) / len(scores)
 
     # 3) ASR-level scores (avg logprob, no_speech_prob)
-    avg_logprob = _safe_float(segment.get("avg_logprob"))
+    avg_logprob = (
+        _safe_float(segment["avg_logprob"]) if "avg_logprob" in present else None
+    )
     if avg_logprob is not None:
         # avg_logprob is in log-space; convert to a rough [0, 1] proxy
         # and clamp to keep things sane.
@@ -178,7 +241,9 @@ def extract_speaker_score(segment: Dict[str, Any], speaker: str) -> float:
             prob_val = 1.0
         return prob_val
 
-    no_speech_prob = _safe_float(segment.get("no_speech_prob"))
+    no_speech_prob = (
+        _safe_float(segment["no_speech_prob"]) if "no_speech_prob" in present else None
+    )
     if no_speech_prob is not None:
         # The lower the no_speech probability, the more confident we are it's real speech.
         # Clamp to [0, 1].
@@ -238,15 +303,17 @@ def build_preview_lines(
 ) -> List[str]:
     """Return preview lines prioritizing highest-confidence JSON segments.
 
-    Segments are first sorted by score (descending) to select the top-N samples
+    Segments are first ranked by score (descending) to select the top-N samples
     for the speaker, then ordered chronologically for readability. If no scored
     segments are available, the function falls back to transcript lines.
     """
 
     if scored_segments:
-        top_segments = sorted(
-            scored_segments, key=lambda seg: seg.get("score", 0.0), reverse=True
-        )[:limit]
+        # Equivalent to sorted(..., reverse=True)[:limit] (ties keep their
+        # order) without sorting every segment of the speaker.
+        top_segments = heapq.nlargest(
+            limit, scored_segments, key=lambda seg: seg.get("score", 0.0)
+        )
         top_segments.sort(key=lambda seg: seg.get("start") or 0.0)
 
         previews: List[str] = []
@@ -281,21 +348,38 @@ def prompt_for_name(speaker: str) -> str:
             print("Please enter either 'y' or 'e'.")
 
 
-def replace_speakers_in_text(text: str, mapping: Dict[str, str]) -> str:
-    def replacer(match: re.Match[str]) -> str:
-        return mapping.get(match.group(0), match.group(0))
+def _mapping_pattern(mapping: Dict[str, str]) -> "re.Pattern[str]":
+    """Match only the mapped speaker tags, so unmapped ones cost no callback."""
+    if "" in mapping:
+        # An empty alternative would match at every word boundary.
+        raise ValueError("Speaker mapping must not contain an empty key")
+    alternation = "|".join(
+        re.escape(speaker) for speaker in sorted(mapping, key=len, reverse=True)
+    )
+    return re.compile(rf"\b(?:{alternation})\b", re.ASCII)
+
 
-    return SPEAKER_RE.sub(replacer, text)
+def replace_speakers_in_text(
+    text: str,
+    mapping: Dict[str, str],
+    pattern: "Optional[re.Pattern[str]]" = None,
+) -> str:
+    if not mapping:
+        return text
+    if pattern is None:
+        pattern = _mapping_pattern(mapping)
+    return pattern.sub(lambda match: mapping[match.group(0)], text)
 
 
 def replace_speakers_in_json(data: Dict, mapping: Dict[str, str]) -> Dict:
     segments = data.get("segments")
-    if isinstance(segments, list):
-        for seg in segments:
-            if isinstance(seg, dict):
-                speaker = seg.get("speaker")
-                if speaker in mapping:
-                    seg["speaker"] = mapping[speaker]
+    if not mapping or not isinstance(segments, list):
+        return data
+    for seg in segments:
+        if isinstance(seg, dict):
+            renamed = mapping.get(seg.get("speaker"))
+            if renamed is not None:
+                seg["speaker"] = renamed
     return data
 
 
@@ -304,47 +388,12 @@ def build_named_path(path: str) -> str:
     return os.path.join(directory, f"NAMED_{filename}")
 
 
-def main() -> None:
-    parser = argparse.ArgumentParser(
-        description=(
-            "Rename SPEAKER_XX placeholders in transcript and JSON diarization outputs."
-        )
-    )
-    parser.add_argument(
-        "transcript",
-        help="Path to the diarized .txt file containing SPEAKER_XX entries",
-    )
-    parser.add_argument(
-        "--json",
-        dest="json_path",
-        help="Optional path to the associated transcription JSON file",
-    )
-    args = parser.parse_args()
-
-    transcript_path = os.path.abspath(args.transcript)
-    if not os.path.isfile(transcript_path):
-        raise FileNotFoundError(f"Unable to find text file: {transcript_path}")
-
-    json_path = args.json_path
-    if not json_path:
-        candidate = os.path.splitext(transcript_path)[0] + ".json"
-        if os.path.isfile(candidate):
-            json_path = candidate
-
-    with open(transcript_path, "r", encoding="utf-8") as f:
-        text_content = f.read()
-    lines = text_content.splitlines()
-
-    scored_segments: Dict[str, List[Dict[str, Any]]] = {}
-    if json_path and os.path.isfile(json_path):
-        with open(json_path, "r", encoding="utf-8") as f:
-            json_data = json.load(f)
-        scored_segments = collect_scored_segments_by_speaker(json_data)
-
-    speaker_lines, speaker_order = collect_speaker_lines(lines)
-    if not speaker_order:
-        print("No SPEAKER_XX tags were found in the provided file.")
-        return
+def prompt_for_mapping(
+    speaker_order: List[str],
+    speaker_lines: Dict[str, List[str]],
+    scored_segments: Dict[str, List[Dict[str, Any]]],
+) -> Dict[str, str]:
+    """Show examples for each speaker and ask for their real names."""
 
     mapping: Dict[str, str] = {}
     for speaker in speaker_order:
@@ -376,21 +425,119 @@ def main() -> None:
 
         mapping[speaker] = prompt_for_name(speaker)
 
+    return mapping
+
+
+def load_mapping_file(path: str) -> Dict[str, str]:
+    """Load a ``{"SPEAKER_XX": "Real Name"}`` JSON file for non-interactive use.
+
+    Names are transliterated the same way as interactively entered ones.
+    """
+
+    data = load_json(path)
+    if not isinstance(data, dict):
+        raise ValueError(f"Mapping file must contain a JSON object: {path}")
+
+    mapping: Dict[str, str] = {}
+    for speaker, name in data.items():
+        # Other keys would rewrite ordinary words in the transcript text and
+        # arbitrary "speaker" values in the JSON.
+        if not SPEAKER_RE.fullmatch(speaker):
+            raise ValueError(
+                f"Mapping key {speaker!r} in {path} is not a SPEAKER_XX tag"
+            )
+        if not isinstance(name, str):
+            raise ValueError(f"Name for {speaker} in {path} must be a string")
+        normalized = transliterate_to_english(name)
+        if not normalized:
+            raise ValueError(f"Name for {speaker} in {path} is empty after transliteration")
+        mapping[speaker] = normalized
+    return mapping
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Rename SPEAKER_XX placeholders in transcript and JSON diarization outputs."
+        )
+    )
+    parser.add_argument(
+        "transcript",
+        help="Path to the diarized .txt file containing SPEAKER_XX entries",
+    )
+    parser.add_argument(
+        "--json",
+        dest="json_path",
+        help="Optional path to the associated transcription JSON file",
+    )
+    parser.add_argument(
+        "--mapping",
+        help=(
+            'Optional JSON file of {"SPEAKER_XX": "Real Name"} pairs; '
+            "skips the interactive prompts"
+        ),
+    )
+    args = parser.parse_args()
+
+    transcript_path = os.path.abspath(args.transcript)
+    if not os.path.isfile(transcript_path):
+        raise FileNotFoundError(f"Unable to find text file: {transcript_path}")
+    if args.mapping and not os.path.isfile(args.mapping):
+        raise FileNotFoundError(f"Unable to find mapping file: {args.mapping}")
+
+    # Stat the JSON path once; an explicit --json path that does not exist is
+    # treated like a missing sibling file.
+    json_path = args.json_path or os.path.splitext(transcript_path)[0] + ".json"
+    if not os.path.isfile(json_path):
+        json_path = None
+
+    # Parsed once and reused for the NAMED_ copy after the prompts.
+    json_data: Optional[Dict[str, Any]] = None
+    scored_segments: Dict[str, List[Dict[str, Any]]] = {}
+    if json_path:
+        json_data = load_json(json_path)
+        if not args.mapping:
+            scored_segments = collect_scored_segments_by_speaker(json_data)
+
+    # Stream the transcript: only the tagged lines are kept for previews, and
+    # the rewrite below reads the file again instead of holding it in memory.
+    with open(transcript_path, "r", encoding="utf-8") as f:
+        speaker_lines, speaker_order = collect_speaker_lines(
+            line.rstrip("\n") for line in f
+        )
+    if not speaker_order:
+        print("No SPEAKER_XX tags were found in the provided file.")
+        return
+
+    if args.mapping:
+        mapping = load_mapping_file(args.mapping)
+        for speaker in speaker_order:
+            if speaker in mapping:
+                print(f"{speaker} -> {mapping[speaker]}")
+            else:
+                print(f"{speaker} is not in the mapping file; keeping the tag.")
+    else:
+        mapping = prompt_for_mapping(speaker_order, speaker_lines, scored_segments)
+
     print("\nAll speakers processed. Creating named files...")
 
     named_text_path = build_named_path(transcript_path)
-    named_text_content = replace_speakers_in_text(text_content, mapping)
-    with open(named_text_path, "w", encoding="utf-8") as f:
-        f.write(named_text_content)
+    pattern = _mapping_pattern(mapping)
+    with open(transcript_path, "r", encoding="utf-8") as src, open(
+        named_text_path, "w", encoding="utf-8", buffering=_WRITE_BUFFER_SIZE
+    ) as dst:
+        for line in src:
+            # Same cheap pre-check as collect_speaker_lines: untagged lines are
+            # copied without running the regex.
+            if "SPEAKER_" in line:
+                line = replace_speakers_in_text(line, mapping, pattern)
+            dst.write(line)
     print(f"Created file: {named_text_path}")
 
-    if json_path and os.path.isfile(json_path):
-        with open(json_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        updated = replace_speakers_in_json(data, mapping)
+    if json_path and json_data is not None:
+        updated = replace_speakers_in_json(json_data, mapping)
         named_json_path = build_named_path(json_path)
-        with open(named_json_path, "w", encoding="utf-8") as f:
-            json.dump(updated, f, ensure_ascii=False, indent=2)
+        dump_json(updated, named_json_path, buffering=_WRITE_BUFFER_SIZE)
         print(f"Created file: {named_json_path}")
     else:
         print("JSON file not found; skipping JSON copy.")
@@ -1,15 +1,31 @@
 """WhisperX transcription helpers and formatting utilities."""
 
-import glob
-import json
+import hashlib
+import importlib.metadata
 import os
-from typing import Any, Dict, List, Optional
+import shutil
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional
 
 from .exceptions import PipelineError
+from .json_utils import load_json
 from .logging_utils import debug
 from .process import run_logged_subprocess
 
 
+# CTranslate2 compute types accepted by WhisperX's --compute_type.
+COMPUTE_TYPES = (
+    "float32",
+    "float16",
+    "bfloat16",
+    "int8",
+    "int8_float32",
+    "int8_float16",
+    "int8_bfloat16",
+    "int16",
+)
+
+
 def format_timestamp(seconds: Optional[float]) -> str:
     """Format seconds as HH:MM:SS.mmm (zero-padded)."""
     if seconds is None:
@@ -20,6 +36,13 @@ def format_timestamp(seconds: Optional[float]) -> str:
         total_ms = 0
     if total_ms < 0:
         total_ms = 0
+    return _format_milliseconds(total_ms)
+
+
+@lru_cache(maxsize=4096)
+def _format_milliseconds(total_ms: int) -> str:
+    # Adjacent segments share boundaries, so many timestamps repeat; cache on
+    # the integer millisecond value rather than on raw floats.
     hours, rem = divmod(total_ms, 3600 * 1000)
     minutes, rem = divmod(rem, 60 * 1000)
     secs, ms = divmod(rem, 1000)
@@ -42,27 +65,36 @@ def smooth_speaker_labels(
     if len(segments) < 3:
         return
 
-    # Ensure chronological order just in case
-    segments.sort(key=lambda s: float(s.get("start", 0.0)))
-
-    for i in range(1, len(segments) - 1):
-        cur = segments[i]
-        prev_seg = segments[i - 1]
-        next_seg = segments[i + 1]
-
+    # Ensure chronological order just in case. WhisperX output is normally
+    # already sorted, so only sort when an out-of-order start is found.
+    starts = [float(s.get("start", 0.0)) for s in segments]
+    if any(later < earlier for earlier, later in zip(starts, starts[1:])):
+        order = sorted(range(len(segments)), key=starts.__getitem__)
+        segments[:] = [segments[i] for i in order]
+        starts = [starts[i] for i in order]
+
+    # Read each segment's fields once; the loop below then works on plain
+    # lists and only touches a segment dict when relabelling it.
+    speakers = [s.get("speaker") for s in segments]
+    ends: List[Optional[float]] = []
+    for seg, start in zip(segments, starts):
         try:
-            start = float(cur.get("start", 0.0))
-            end = float(cur.get("end", start))
+            ends.append(float(seg.get("end", start)))
         except (TypeError, ValueError):
+            ends.append(None)
+
+    for i in range(1, len(segments) - 1):
+        end = ends[i]
+        if end is None:
             continue
 
-        duration = max(0.0, end - start)
+        duration = max(0.0, end - starts[i])
         if duration > max_short:
             continue
 
-        cur_speaker = cur.get("speaker")
-        prev_speaker = prev_seg.get("speaker")
-        next_speaker = next_seg.get("speaker")
+        cur_speaker = speakers[i]
+        prev_speaker = speakers[i - 1]
+        next_speaker = speakers[i + 1]
 
         if not prev_speaker or not next_speaker:
             continue
@@ -77,7 +109,8 @@ def smooth_speaker_labels(
                 f"{cur_speaker!r} -> {prev_speaker!r} "
                 f"(duration={duration:.3f}s)."
             )
-            cur["speaker"] = prev_speaker
+            segments[i]["speaker"] = prev_speaker
+            speakers[i] = prev_speaker
 
 
 def build_diarized_transcript_lines_from_data(data: Dict[str, Any]) -> List[str]:
@@ -93,17 +126,11 @@ def build_diarized_transcript_lines_from_data(data: Dict[str, Any]) -> List[str]
 
     smooth_speaker_labels(segments)
 
-    lines: List[str] = []
-    for seg in segments:
-        start = seg.get("start")
-        end = seg.get("end")
-        text = (seg.get("text") or "").strip()
-        speaker = seg.get("speaker") or "UNKNOWN"
-        start_ts = format_timestamp(start)
-        end_ts = format_timestamp(end)
-        line = f"[{start_ts} --> {end_ts}] {speaker}: {text}"
-        lines.append(line)
-    return lines
+    return [
+        f"[{format_timestamp(seg.get('start'))} --> {format_timestamp(seg.get('end'))}] "
+        f"{seg.get('speaker') or 'UNKNOWN'}: {(seg.get('text') or '').strip()}"
+        for seg in segments
+    ]
 
 
 def run_whisperx_cli(
@@ -111,20 +138,47 @@ def run_whisperx_cli(
     audio_path: str,
     hf_token: str,
     work_dir: str,
+    cache_dir: Optional[str] = None,
+    before_run: Optional[Callable[[], None]] = None,
 ) -> str:
     """
     Run WhisperX CLI to produce a diarized JSON transcription.
 
-    High-quality settings:
+    With ``cache_dir`` set, the JSON is stored there keyed by a hash of the
+    audio bytes and the settings below, and an identical later run reuses it
+    instead of transcribing again (YT_DIARIZER_IGNORE_TRANSCRIPT_CACHE=1
+    forces a fresh run). ``before_run`` is called only when WhisperX is
+    actually started, i.e. not on a cache hit.
+
+    Settings:
       - model: large-v3
-      - compute_type: float32
-      - beam_size: 5
+      - device: YT_DIARIZER_DEVICE (default cpu; "cuda:N" pins GPU N)
+      - compute_type: YT_DIARIZER_COMPUTE_TYPE (default int8 on CPU,
+        float16 on CUDA; float32 restores full CPU precision)
+      - beam_size: YT_DIARIZER_BEAM_SIZE (default 1 on CPU, 5 on CUDA)
+      - batch_size: YT_DIARIZER_BATCH_SIZE (default 16 VAD windows per forward pass)
       - diarization: pyannote
     """
     language = os.environ.get("YT_DIARIZER_LANGUAGE") or None
     initial_prompt = os.environ.get("YT_DIARIZER_INITIAL_PROMPT") or None
     min_speakers = os.environ.get("YT_DIARIZER_MIN_SPEAKERS") or None
     max_speakers = os.environ.get("YT_DIARIZER_MAX_SPEAKERS") or None
+    batch_size = os.environ.get("YT_DIARIZER_BATCH_SIZE") or "16"
+    if not batch_size.isdigit() or int(batch_size) < 1:
+        raise PipelineError(
+            f"YT_DIARIZER_BATCH_SIZE must be a positive integer, got {batch_size!r}."
+        )
+    beam_size_override = os.environ.get("YT_DIARIZER_BEAM_SIZE") or None
+    if beam_size_override and (not beam_size_override.isdigit() or int(beam_size_override) < 1):
+        raise PipelineError(
+            f"YT_DIARIZER_BEAM_SIZE must be a positive integer, got {beam_size_override!r}."
+        )
+    compute_type_override = os.environ.get("YT_DIARIZER_COMPUTE_TYPE") or None
+    if compute_type_override and compute_type_override not in COMPUTE_TYPES:
+        raise PipelineError(
+            f"YT_DIARIZER_COMPUTE_TYPE must be one of {', '.join(COMPUTE_TYPES)}, "
+            f"got {compute_type_override!r}."
+        )
 
     if language:
         debug(f"WhisperX language hint: {language}")
@@ -136,9 +190,24 @@ def run_whisperx_cli(
     if initial_prompt:
         debug("WhisperX will use an initial prompt for decoding.")
 
-    debug("Running WhisperX diarization with large-v3 model (high quality)...")
-
+    device = os.environ.get("YT_DIARIZER_DEVICE") or "cpu"
+    device, _, device_index = device.partition(":")
+    # Quantized int8 weights and greedy decoding roughly double CPU speed for
+    # a small accuracy cost; GPUs keep float16 and beam search.
+    on_cuda = device.startswith("cuda")
+    compute_type = compute_type_override or ("float16" if on_cuda else "int8")
+    beam_size = beam_size_override or ("5" if on_cuda else "1")
+    debug(
+        f"Running WhisperX diarization with large-v3 on {device} "
+        f"({compute_type}, beam size {beam_size})..."
+    )
+
+    # Follow OMP_NUM_THREADS when the pipeline (or the user) has sized it;
+    # WhisperX passes --threads to torch.set_num_threads, overriding OpenMP.
     threads = os.cpu_count() or 1
+    omp_threads = os.environ.get("OMP_NUM_THREADS", "")
+    if omp_threads.isdigit() and int(omp_threads) > 0:
+        threads = int(omp_threads)
 
     cmd = [
         whisperx_bin,
@@ -149,13 +218,13 @@ def run_whisperx_cli(
         "--hf_token",
         hf_token,
         "--batch_size",
-        "8",
+        batch_size,
         "--beam_size",
-        "5",
+        beam_size,
         "--compute_type",
-        "float32",
+        compute_type,
         "--device",
-        "cpu",
+        device,
         "--threads",
         str(threads),
         "--output_format",
@@ -168,6 +237,9 @@ def run_whisperx_cli(
         "True",
     ]
 
+    if device_index:
+        cmd.extend(["--device_index", device_index])
+
     if language:
         cmd.extend(["--language", language])
 
@@ -180,30 +252,106 @@ def run_whisperx_cli(
     if initial_prompt:
         cmd.extend(["--initial_prompt", initial_prompt])
 
-    rc, lines = run_logged_subprocess(cmd, "whisperx diarization")
+    basename = os.path.splitext(os.path.basename(audio_path))[0]
+    cached_path: Optional[str] = None
+    if cache_dir:
+        cache_key = _transcript_cache_key(
+            audio_path,
+            [
+                _whisperx_version(),
+                "large-v3",
+                batch_size,
+                beam_size,
+                compute_type,
+                device,
+                device_index,
+                language or "",
+                initial_prompt or "",
+                str(min_speakers or ""),
+                str(max_speakers or ""),
+            ],
+        )
+        cached_path = os.path.join(cache_dir, f"{cache_key}.json")
+        if os.path.isfile(cached_path) and not os.environ.get(
+            "YT_DIARIZER_IGNORE_TRANSCRIPT_CACHE"
+        ):
+            json_path = os.path.join(work_dir, f"{basename}.json")
+            shutil.copyfile(cached_path, json_path)
+            debug(f"Reusing cached WhisperX output for identical audio: {cached_path}")
+            return json_path
+
+    if before_run is not None:
+        before_run()
+
+    rc, lines = run_logged_subprocess(cmd, "whisperx diarization", tail=50)
     if rc != 0:
-        snippet = "\n".join([ln for ln in lines if ln][-50:])
+        snippet = "\n".join(lines)
         raise PipelineError(
             f"WhisperX diarization failed with exit code {rc}.\nLast output snippet:\n{snippet}"
         )
 
-    basename = os.path.splitext(os.path.basename(audio_path))[0]
     json_path = os.path.join(work_dir, f"{basename}.json")
     if not os.path.isfile(json_path):
-        json_candidates = glob.glob(os.path.join(work_dir, "*.json"))
+        # Hidden files are skipped like glob("*.json") did; the workspace also
+        # holds bookkeeping files such as .ffmpeg-prepared.json.
+        with os.scandir(work_dir) as entries:
+            json_candidates = [
+                entry.path
+                for entry in entries
+                if entry.name.endswith(".json")
+                and not entry.name.startswith(".")
+                and entry.is_file()
+            ]
         if not json_candidates:
             raise PipelineError(
                 "WhisperX completed but no JSON output was found in the workspace."
             )
-        json_candidates.sort()
-        json_path = json_candidates[0]
+        json_path = min(json_candidates)
 
     debug(f"WhisperX JSON output: {json_path}")
+    if cached_path:
+        _store_cached_transcript(json_path, cached_path)
     return json_path
 
 
+def _whisperx_version() -> str:
+    # The binary path is not stable across runs (ephemeral venvs live in the
+    # per-run workspace), so key the cache on the installed package version.
+    try:
+        return importlib.metadata.version("whisperx")
+    except importlib.metadata.PackageNotFoundError:
+        return ""
+
+
+def _transcript_cache_key(audio_path: str, settings: List[str]) -> str:
+    """Hash the audio file and the output-affecting WhisperX settings."""
+    digest = hashlib.blake2b(digest_size=16)
+    for value in settings:
+        digest.update(value.encode("utf-8"))
+        digest.update(b"\0")
+    with open(audio_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _store_cached_transcript(json_path: str, cached_path: str) -> None:
+    # Copy to a temporary name first so a concurrent run never reads a
+    # half-written file; the cache is an optimisation, so failures only log.
+    tmp_path = f"{cached_path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(cached_path), exist_ok=True)
+        shutil.copyfile(json_path, tmp_path)
+        os.replace(tmp_path, cached_path)
+    except OSError as exc:
+        debug(f"Could not cache WhisperX output: {exc}")
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
 def build_diarized_transcript_from_json(json_path: str) -> List[str]:
     """Load WhisperX JSON file and build diarized transcript lines."""
-    with open(json_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    data = load_json(json_path)
     return build_diarized_transcript_lines_from_data(data)